@@ -3,17 +3,32 @@ Dynamic NIFTY Options Fetcher
 Fetches option data for strikes from -1000 to +1000 of current spot price
 
 Usage:
-    python dynamic_options_fetcher.py [--range RANGE] [--interval INTERVAL]
+    python dynamic_options_fetcher.py [--range RANGE] [--interval INTERVAL] [--stream] [--poll SECONDS]
 """
 
 import os
-from kiteconnect import KiteConnect
+import glob
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from kiteconnect import KiteConnect, KiteTicker
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 import logging
 
+# pyarrow is optional; used for faster CSV writes when installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
 # Import authentication
 from kite_authenticator import get_kite_token
 
@@ -27,8 +42,15 @@ logger = logging.getLogger(__name__)
 class DynamicOptionsDataFetcher:
     """Fetches NIFTY options data dynamically based on spot price"""
     
-    def __init__(self):
-        """Initialize the fetcher"""
+    def __init__(self, max_workers: int = 4, spot_cache_ttl: float = 30.0, stream: bool = False):
+        """
+        Initialize the fetcher
+        
+        Args:
+            max_workers: Number of quote batches fetched concurrently
+            spot_cache_ttl: Seconds a fetched spot price is reused (default: 30)
+            stream: Read option data from a KiteTicker websocket instead of polling quote()
+        """
         # Get access token
         self.access_token = get_kite_token(force_new=False)
         
@@ -41,62 +63,83 @@ class DynamicOptionsDataFetcher:
         self.kite = KiteConnect(api_key=self.api_key)
         self.kite.set_access_token(self.access_token)
         
+        # Number of quote batches fetched concurrently
+        self.max_workers = max_workers
+        
+        # Share one pooled keep-alive session across all (concurrent) Kite calls
+        session = requests.Session()
+        pool_size = max(8, max_workers)
+        session.mount("https://", HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        self.kite.reqsession = session
+        
+        # Cached (monotonic_ts, price) for spot and (date, expiry) for the expiry calendar
+        self.spot_cache_ttl = spot_cache_ttl
+        self._spot_cache = None
+        self._expiry_cache = None
+        
+        # Websocket streaming state (MODE_FULL ticks keyed by instrument token)
+        self.stream = stream
+        self.stream_timeout = 10
+        self._ticker = None
+        self._ticks = {}
+        self._subscribed = set()
+        self._first_tick = threading.Event()
+        self._instrument_tokens = None
+        
         logger.info("✅ Dynamic Options Fetcher initialized successfully!")
     
-    def get_nifty_spot_price(self) -> float:
-        """Get current NIFTY spot price"""
+    def get_nifty_spot_price(self, force: bool = False) -> float:
+        """Get current NIFTY spot price, reusing it for spot_cache_ttl seconds unless force=True"""
+        if not force and self._spot_cache is not None:
+            cached_at, spot_price = self._spot_cache
+            if time.monotonic() - cached_at < self.spot_cache_ttl:
+                return spot_price
+        
         try:
             quote = self.kite.quote(["NSE:NIFTY 50"])
             spot_price = quote["NSE:NIFTY 50"]["last_price"]
+            self._spot_cache = (time.monotonic(), spot_price)
             logger.info(f"📊 NIFTY Spot Price: {spot_price}")
             return spot_price
         except Exception as e:
             logger.error(f"❌ Error fetching spot price: {e}")
             raise
     
-    def get_current_expiry(self) -> Tuple[datetime, str]:
-        """Get current month expiry date and format"""
+    @staticmethod
+    def _last_thursday(year: int, month: int) -> datetime:
+        """Last Thursday of the given month, computed from the month's last day"""
+        next_month = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        last_day = next_month - timedelta(days=1)
+        return last_day - timedelta(days=(last_day.weekday() - 3) % 7)  # Thursday is 3
+    
+    def get_current_expiry(self, force: bool = False) -> Tuple[datetime, str]:
+        """Get current month expiry date and format, computed once per day unless force=True"""
         today = datetime.now()
         
+        if not force and self._expiry_cache is not None and self._expiry_cache[0] == today.date():
+            return self._expiry_cache[1]
+        
         # Get last Thursday of current month
         year = today.year
         month = today.month
-        
-        # Find last Thursday
-        if month == 12:
-            next_month = datetime(year + 1, 1, 1)
-        else:
-            next_month = datetime(year, month + 1, 1)
-        
-        last_day = next_month - timedelta(days=1)
-        
-        while last_day.weekday() != 3:  # Thursday is 3
-            last_day -= timedelta(days=1)
+        last_day = self._last_thursday(year, month)
         
         # If expiry has passed, get next month's expiry
         if today.date() > last_day.date():
-            if month == 12:
-                month = 1
-                year += 1
-            else:
-                month += 1
-            
-            # Recalculate for next month
-            if month == 12:
-                next_month = datetime(year + 1, 1, 1)
-            else:
-                next_month = datetime(year, month + 1, 1)
-            
-            last_day = next_month - timedelta(days=1)
-            while last_day.weekday() != 3:
-                last_day -= timedelta(days=1)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            last_day = self._last_thursday(year, month)
         
         # Format: 24JAN, 24FEB, etc.
         expiry_format = last_day.strftime("%y%b").upper()
         
+        self._expiry_cache = (today.date(), (last_day, expiry_format))
         return last_day, expiry_format
     
-    def generate_strike_range(self, spot_price: float, range_value: int = 1000, interval: int = 50) -> List[int]:
+    def generate_strike_range(self, spot_price: float, range_value: int = 1000, interval: int = 50) -> np.ndarray:
         """
         Generate strike prices based on spot price
         
@@ -106,82 +149,226 @@ class DynamicOptionsDataFetcher:
             interval: Strike interval (default: 50)
         
         Returns:
-            List of strike prices
+            Array of strike prices (int32)
         """
         # Calculate start and end strikes
         start_strike = int((spot_price - range_value) // interval) * interval
         end_strike = int((spot_price + range_value) // interval + 1) * interval
         
         # Generate strikes
-        strikes = list(range(start_strike, end_strike + interval, interval))
+        strikes = np.arange(start_strike, end_strike + interval, interval, dtype=np.int32)
         
         logger.info(f"📊 Generated {len(strikes)} strikes from {start_strike} to {end_strike}")
         return strikes
     
-    def fetch_options_data(self, strikes: List[int], expiry_format: str) -> pd.DataFrame:
+    def _fetch_quote_batch(self, batch_num: int, total_batches: int, batch_symbols: List[str]) -> Dict:
+        """Fetch quotes for one batch of symbols, returning an empty dict on failure"""
+        try:
+            logger.info("📥 Fetching batch %d/%d", batch_num, total_batches)
+            return self.kite.quote(batch_symbols)
+        except Exception as e:
+            logger.error(f"❌ Error fetching batch {batch_num}: {e}")
+            return {}
+    
+    def _load_instruments(self) -> pd.DataFrame:
+        """
+        Load NIFTY NFO instruments, fetching the dump at most once per day
+        
+        The filtered dump is cached on disk as nfo_instruments_{YYYYMMDD}.parquet
+        so repeated runs on the same day skip the instruments() download; older
+        cache files are removed.
+        """
+        cache_file = f"nfo_instruments_{datetime.now().strftime('%Y%m%d')}.parquet"
+        
+        if os.path.exists(cache_file):
+            try:
+                return pd.read_parquet(cache_file)
+            except Exception as e:
+                logger.warning(f"⚠️ Ignoring unreadable instruments cache {cache_file}: {e}")
+        
+        logger.info("📥 Downloading NFO instruments dump...")
+        instruments = pd.DataFrame(self.kite.instruments("NFO"))
+        instruments = instruments[instruments['name'] == "NIFTY"].reset_index(drop=True)
+        
+        try:
+            tmp_file = cache_file + ".tmp"
+            instruments.to_parquet(tmp_file, index=False)
+            os.replace(tmp_file, cache_file)
+            
+            # Only dated cache files (and the old .pkl ones); never .tmp files or other names
+            date_glob = "[0-9]" * 8
+            for ext in (".parquet", ".pkl"):
+                for stale_file in glob.glob(f"nfo_instruments_{date_glob}{ext}"):
+                    if stale_file != cache_file:
+                        os.remove(stale_file)
+            logger.info(f"💾 Cached {len(instruments)} NIFTY instruments to {cache_file}")
+        except (OSError, ImportError) as e:
+            logger.warning(f"⚠️ Could not write instruments cache: {e}")
+        
+        return instruments
+    
+    def load_instrument_tokens(self) -> Dict[str, int]:
+        """Get the {tradingsymbol: instrument_token} map, building it on first use"""
+        if self._instrument_tokens is None:
+            instruments = self._load_instruments()
+            # tolist() keeps plain ints, which the websocket subscribe payload needs
+            self._instrument_tokens = dict(zip(instruments['tradingsymbol'].tolist(), instruments['instrument_token'].tolist()))
+        return self._instrument_tokens
+    
+    def _resolve_instrument_tokens(self, tradingsymbols: List[str]) -> Dict[str, int]:
+        """Map NFO trading symbols to instrument tokens"""
+        instrument_tokens = self.load_instrument_tokens()
+        return {
+            sym: instrument_tokens[sym]
+            for sym in tradingsymbols
+            if sym in instrument_tokens
+        }
+    
+    def _on_ticks(self, ws, ticks):
+        """Keep the latest tick per instrument token"""
+        for tick in ticks:
+            self._ticks[tick['instrument_token']] = tick
+        self._first_tick.set()
+    
+    def _on_connect(self, ws, response):
+        """Subscribe to every requested token in full mode (also runs on reconnect)"""
+        tokens = list(self._subscribed)
+        ws.subscribe(tokens)
+        ws.set_mode(ws.MODE_FULL, tokens)
+    
+    def _subscribe(self, tokens: List[int]):
+        """Start the websocket on first use and subscribe to any new tokens"""
+        new_tokens = [token for token in tokens if token not in self._subscribed]
+        self._subscribed.update(new_tokens)
+        
+        if self._ticker is None:
+            self._ticker = KiteTicker(self.api_key, self.access_token)
+            self._ticker.on_ticks = self._on_ticks
+            self._ticker.on_connect = self._on_connect
+            self._ticker.connect(threaded=True)
+            logger.info(f"📡 Streaming {len(self._subscribed)} instruments via websocket")
+        elif new_tokens and self._ticker.is_connected():
+            self._ticker.subscribe(new_tokens)
+            self._ticker.set_mode(self._ticker.MODE_FULL, new_tokens)
+    
+    def _get_streamed_quotes(self, full_symbols: List[str]) -> Dict:
+        """
+        Build a quote()-shaped dict from the latest websocket ticks
+        
+        The first call starts the stream and waits up to stream_timeout seconds
+        for ticks; instruments that have not ticked yet are reported as missing.
+        """
+        tokens = self._resolve_instrument_tokens([sym[len("NFO:"):] for sym in full_symbols])
+        self._subscribe(list(tokens.values()))
+        
+        if not self._first_tick.wait(timeout=self.stream_timeout):
+            logger.warning("⚠️ No ticks received from websocket yet")
+        
+        quote_data = {}
+        for sym, token in tokens.items():
+            tick = self._ticks.get(token)
+            if tick:
+                # Full-mode ticks report volume as volume_traded
+                quote_data[f"NFO:{sym}"] = {**tick, "volume": tick.get("volume_traded", 0)}
+        return quote_data
+    
+    def fetch_options_data(self, strikes: np.ndarray, expiry_format: str) -> pd.DataFrame:
         """
         Fetch options data for given strikes
         
         Args:
-            strikes: List of strike prices
+            strikes: Array of strike prices
             expiry_format: Expiry format (e.g., "24JAN")
         
         Returns:
             DataFrame with options data
         """
-        all_data = []
         timestamp = datetime.now()
         
-        # Build option symbols
-        option_symbols = []
-        for strike in strikes:
-            for opt_type in ["CE", "PE"]:
-                symbol = f"NIFTY{expiry_format}{strike}{opt_type}"
-                option_symbols.append(symbol)
+        # Build option symbols (CE/PE interleaved per strike) in one vectorized pass
+        strikes_arr = np.asarray(strikes).astype(str)
+        prefix = f"NIFTY{expiry_format}"
+        ce_symbols = np.char.add(np.char.add(prefix, strikes_arr), "CE")
+        pe_symbols = np.char.add(np.char.add(prefix, strikes_arr), "PE")
+        option_symbols = np.stack([ce_symbols, pe_symbols], axis=1).ravel()
+        full_symbols = np.char.add("NFO:", option_symbols)
         
-        # Fetch data in batches (Kite API has limits)
-        batch_size = 200  # Kite allows max 500 symbols per request
-        
-        for i in range(0, len(option_symbols), batch_size):
-            batch_symbols = option_symbols[i:i + batch_size]
-            full_symbols = [f"NFO:{sym}" for sym in batch_symbols]
+        if self.stream:
+            quote_data = self._get_streamed_quotes(full_symbols.tolist())
+        else:
+            # Fetch data in batches (Kite API has limits)
+            batch_size = 200  # Kite allows max 500 symbols per request
+            batches = [full_symbols[i:i + batch_size].tolist() for i in range(0, len(full_symbols), batch_size)]
             
-            try:
-                logger.info(f"📥 Fetching batch {i//batch_size + 1}/{(len(option_symbols)-1)//batch_size + 1}")
-                quote_data = self.kite.quote(full_symbols)
-                
-                # Process each symbol
-                for sym in batch_symbols:
-                    full_sym = f"NFO:{sym}"
-                    data = quote_data.get(full_sym, {})
-                    
-                    if data and "last_price" in data:
-                        ohlc = data.get("ohlc", {})
-                        
-                        row = {
-                            "timestamp": timestamp,
-                            "symbol": sym,
-                            "expiry": expiry_format,
-                            "ltp": data.get("last_price", 0),
-                            "open": ohlc.get("open", 0),
-                            "high": ohlc.get("high", 0),
-                            "low": ohlc.get("low", 0),
-                            "prev_close": ohlc.get("close", 0),
-                            "oi": data.get("oi", 0),
-                            "oi_day_high": data.get("oi_day_high", 0),
-                            "oi_day_low": data.get("oi_day_low", 0),
-                            "volume": data.get("volume", 0)
-                        }
-                        all_data.append(row)
-                    else:
-                        logger.warning(f"⚠️ No data for {sym}")
-                
-            except Exception as e:
-                logger.error(f"❌ Error fetching batch: {e}")
-                continue
-        
-        # Create DataFrame
-        df = pd.DataFrame(all_data)
+            # Batches are network-bound, so issue them concurrently and merge the results
+            quote_data = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._fetch_quote_batch, batch_num, len(batches), batch)
+                    for batch_num, batch in enumerate(batches, 1)
+                ]
+                for future in futures:
+                    quote_data.update(future.result())
+        
+        # Fill preallocated column arrays (one per field) instead of building per-row dicts.
+        # Prices fit float32 and OI fits int32; volume stays int64 since expiry-day
+        # volume on near-ATM strikes can exceed the int32 range.
+        n = len(full_symbols)
+        found = np.zeros(n, dtype=bool)
+        ltp = np.zeros(n, dtype=np.float32)
+        open_ = np.zeros(n, dtype=np.float32)
+        high = np.zeros(n, dtype=np.float32)
+        low = np.zeros(n, dtype=np.float32)
+        prev_close = np.zeros(n, dtype=np.float32)
+        oi = np.zeros(n, dtype=np.int32)
+        oi_day_high = np.zeros(n, dtype=np.int32)
+        oi_day_low = np.zeros(n, dtype=np.int32)
+        volume = np.zeros(n, dtype=np.int64)
+        
+        # Only symbols that came back with a price get a row; misses are found by set difference
+        symbol_index = {full_sym: idx for idx, full_sym in enumerate(full_symbols.tolist())}
+        present = [
+            full_sym for full_sym, data in quote_data.items()
+            if full_sym in symbol_index and data.get("last_price") is not None
+        ]
+        missing = symbol_index.keys() - set(present)
+        
+        for full_sym in present:
+            idx = symbol_index[full_sym]
+            data = quote_data[full_sym]
+            ohlc = data.get("ohlc", {})
+            
+            found[idx] = True
+            ltp[idx] = data["last_price"]
+            open_[idx] = ohlc.get("open", 0)
+            high[idx] = ohlc.get("high", 0)
+            low[idx] = ohlc.get("low", 0)
+            prev_close[idx] = ohlc.get("close", 0)
+            oi[idx] = data.get("oi", 0)
+            oi_day_high[idx] = data.get("oi_day_high", 0)
+            oi_day_low[idx] = data.get("oi_day_low", 0)
+            volume[idx] = data.get("volume", 0)
+        
+        if missing:
+            missing_symbols = [full_sym[len("NFO:"):] for full_sym in sorted(missing, key=symbol_index.get)]
+            logger.warning("⚠️ No data for %d symbols: %s", len(missing_symbols), ", ".join(missing_symbols))
+        
+        # Create DataFrame from the column arrays in a single call
+        num_found = int(found.sum())
+        df = pd.DataFrame({
+            "timestamp": np.full(num_found, np.datetime64(timestamp)),
+            "symbol": option_symbols[found].astype(object),
+            "expiry": np.full(num_found, expiry_format, dtype=object),
+            "ltp": ltp[found],
+            "open": open_[found],
+            "high": high[found],
+            "low": low[found],
+            "prev_close": prev_close[found],
+            "oi": oi[found],
+            "oi_day_high": oi_day_high[found],
+            "oi_day_low": oi_day_low[found],
+            "volume": volume[found]
+        })
         logger.info(f"✅ Fetched data for {len(df)} options")
         
         return df
@@ -199,13 +386,14 @@ class DynamicOptionsDataFetcher:
         print(f"📆 Expiry: {df['expiry'].iloc[0]}")
         print("="*80)
         
-        # Separate CE and PE
-        ce_df = df[df['symbol'].str.endswith('CE')].copy()
-        pe_df = df[df['symbol'].str.endswith('PE')].copy()
+        # Slice strike and option type from the fixed layout NIFTY{expiry}{strike}{CE|PE}
+        strike_start = len("NIFTY") + len(df['expiry'].iloc[0])
+        is_ce = df['symbol'].str[-2:].to_numpy() == 'CE'
+        df = df.assign(strike=df['symbol'].str[strike_start:-2].astype(np.int32))
         
-        # Extract strike prices
-        ce_df['strike'] = ce_df['symbol'].str.extract(r'(\d+)CE').astype(int)
-        pe_df['strike'] = pe_df['symbol'].str.extract(r'(\d+)PE').astype(int)
+        # Separate CE and PE from a single mask (read-only below, so no copies)
+        ce_df = df.iloc[is_ce]
+        pe_df = df.iloc[~is_ce]
         
         # Find ATM strike
         atm_strike = int(round(spot_price / 50) * 50)
@@ -220,15 +408,15 @@ class DynamicOptionsDataFetcher:
         print(f"{'Strike':>8} | {'CE LTP':>8} | {'CE OI':>12} | {'PE LTP':>8} | {'PE OI':>12}")
         print("-"*80)
         
-        for strike in nearby_strikes:
-            ce_row = ce_df[ce_df['strike'] == strike]
-            pe_row = pe_df[pe_df['strike'] == strike]
-            
-            ce_ltp = ce_row['ltp'].iloc[0] if not ce_row.empty else 0
-            ce_oi = ce_row['oi'].iloc[0] if not ce_row.empty else 0
-            pe_ltp = pe_row['ltp'].iloc[0] if not pe_row.empty else 0
-            pe_oi = pe_row['oi'].iloc[0] if not pe_row.empty else 0
-            
+        # Look up all nearby strikes at once via a strike index (missing strikes show as 0)
+        ce_view = ce_df.set_index('strike')[['ltp', 'oi']].reindex(nearby_strikes, fill_value=0)
+        pe_view = pe_df.set_index('strike')[['ltp', 'oi']].reindex(nearby_strikes, fill_value=0)
+        
+        for strike, ce_ltp, ce_oi, pe_ltp, pe_oi in zip(
+            nearby_strikes,
+            ce_view['ltp'].tolist(), ce_view['oi'].tolist(),
+            pe_view['ltp'].tolist(), pe_view['oi'].tolist()
+        ):
             marker = " <<<" if strike == atm_strike else ""
             print(f"{strike:>8} | {ce_ltp:>8.2f} | {ce_oi:>12,} | {pe_ltp:>8.2f} | {pe_oi:>12,}{marker}")
         
@@ -242,8 +430,10 @@ class DynamicOptionsDataFetcher:
         print(f"PCR (OI): {pe_df['oi'].sum() / ce_df['oi'].sum():.2f}")
         
         # Find max OI strikes
-        max_ce_oi_strike = ce_df.loc[ce_df['oi'].idxmax(), 'strike'] if not ce_df.empty else 0
-        max_pe_oi_strike = pe_df.loc[pe_df['oi'].idxmax(), 'strike'] if not pe_df.empty else 0
+        ce_oi_arr = ce_df['oi'].to_numpy()
+        pe_oi_arr = pe_df['oi'].to_numpy()
+        max_ce_oi_strike = ce_df['strike'].to_numpy()[ce_oi_arr.argmax()] if ce_oi_arr.size else 0
+        max_pe_oi_strike = pe_df['strike'].to_numpy()[pe_oi_arr.argmax()] if pe_oi_arr.size else 0
         
         print(f"\n🎯 KEY LEVELS:")
         print(f"Max CE OI Strike (Resistance): {max_ce_oi_strike}")
@@ -254,9 +444,20 @@ class DynamicOptionsDataFetcher:
         if filename is None:
             filename = f"nifty_options_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
-        df.to_csv(filename, index=False)
+        if pa is not None:
+            # C++ writer with vectorized formatting
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), filename)
+        else:
+            df.to_csv(filename, index=False)
         logger.info(f"💾 Data saved to {filename}")
         return filename
+    
+    def close(self):
+        """Stop the websocket stream if it was started"""
+        if self._ticker is not None:
+            self._ticker.close()
+            self._ticker = None
+            logger.info("🔌 Websocket closed")
 
 def main():
     """Main function"""
@@ -267,34 +468,50 @@ def main():
                        help='Strike interval (default: 50)')
     parser.add_argument('--save', action='store_true',
                        help='Save data to CSV file')
+    parser.add_argument('--stream', action='store_true',
+                       help='Stream option data over the Kite websocket instead of polling quotes')
+    parser.add_argument('--poll', type=int, default=0,
+                       help='Repeat the fetch every POLL seconds until interrupted (default: run once)')
     
     args = parser.parse_args()
     
     try:
         # Initialize fetcher
-        fetcher = DynamicOptionsDataFetcher()
-        
-        # Get spot price
-        spot_price = fetcher.get_nifty_spot_price()
-        
-        # Get current expiry
-        expiry_date, expiry_format = fetcher.get_current_expiry()
-        logger.info(f"📅 Current expiry: {expiry_date.date()} ({expiry_format})")
-        
-        # Generate strike range
-        strikes = fetcher.generate_strike_range(spot_price, args.range, args.interval)
-        
-        # Fetch options data
-        logger.info("📥 Fetching options data...")
-        df = fetcher.fetch_options_data(strikes, expiry_format)
-        
-        # Display summary
-        fetcher.display_summary(df, spot_price)
-        
-        # Save if requested
-        if args.save:
-            filename = fetcher.save_to_csv(df)
-            print(f"\n✅ Data saved to: {filename}")
+        fetcher = DynamicOptionsDataFetcher(stream=args.stream)
+        
+        while True:
+            # Get spot price; on the first streamed poll, overlap it with the instruments load
+            if args.stream and fetcher._instrument_tokens is None:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    spot_future = executor.submit(fetcher.get_nifty_spot_price)
+                    tokens_future = executor.submit(fetcher.load_instrument_tokens)
+                    spot_price = spot_future.result()
+                    tokens_future.result()  # Surface a failed instruments load here
+            else:
+                spot_price = fetcher.get_nifty_spot_price()
+            
+            # Get current expiry
+            expiry_date, expiry_format = fetcher.get_current_expiry()
+            logger.info(f"📅 Current expiry: {expiry_date.date()} ({expiry_format})")
+            
+            # Generate strike range
+            strikes = fetcher.generate_strike_range(spot_price, args.range, args.interval)
+            
+            # Fetch options data
+            logger.info("📥 Fetching options data...")
+            df = fetcher.fetch_options_data(strikes, expiry_format)
+            
+            # Display summary
+            fetcher.display_summary(df, spot_price)
+            
+            # Save if requested
+            if args.save:
+                filename = fetcher.save_to_csv(df)
+                print(f"\n✅ Data saved to: {filename}")
+            
+            if args.poll <= 0:
+                break
+            time.sleep(args.poll)
         
     except KeyboardInterrupt:
         logger.info("\n⏹️ Process interrupted by user")
@@ -302,6 +519,9 @@ def main():
         logger.error(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if 'fetcher' in locals():
+            fetcher.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -9,6 +9,12 @@ Requirements:
 Install requirements:
 pip install kiteconnect pandas
 
+Environment:
+- DX_FLOAT32=1 stores OHLC and the derived price columns as float32 and volume as uint32
+- DX_VERIFY=1 enables the profile() check in verify_connection
+- DX_FORMAT=parquet|feather|csv selects the save_data output format
+  (default: parquet when pyarrow is installed, otherwise csv)
+
 Important Notes:
 - Configured for Indian Stock Market (NSE/BSE)
 - Market hours: 9:15 AM to 3:30 PM IST
@@ -16,13 +22,33 @@ Important Notes:
 - Data after market close (3:30 PM) for the current day is automatically filtered
 """
 
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from kiteconnect import KiteConnect
 import os
+import glob
+import io
+import sys
+import tempfile
 import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import redirect_stdout
 from dotenv import load_dotenv
 
+# pyarrow is optional; when installed it is used for faster CSV writes and
+# for spilling chunked downloads to a temporary parquet file
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 # Import our authentication module
 try:
     from kite_authenticator import get_kite_token
@@ -33,6 +59,127 @@ except ImportError:
 
 load_dotenv()
 
+# Column dtypes of candles returned by kite.historical_data()
+CANDLE_DTYPES = {'open': np.float64, 'high': np.float64, 'low': np.float64, 'close': np.float64, 'volume': np.int64}
+
+# Compact dtypes applied to fetched OHLCV data when DX_FLOAT32=1
+COMPACT_OHLCV_DTYPES = {'open': 'float32', 'high': 'float32', 'low': 'float32', 'close': 'float32', 'volume': 'uint32'}
+
+# File extension per save_data output format; parquet/feather need pyarrow
+OUTPUT_EXTENSIONS = {'parquet': '.parquet', 'feather': '.feather', 'csv': '.csv'}
+DEFAULT_OUTPUT_FORMAT = os.getenv("DX_FORMAT", "parquet" if pa is not None else "csv").lower()
+
+# Weekday names indexed by pandas dayofweek (Monday=0)
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Days fetched per historical_data request, by interval (anything else uses the daily size)
+CHUNK_DAYS = {
+    'minute': 5, '3minute': 15, '5minute': 60, '10minute': 60,
+    '15minute': 60, '30minute': 100, 'hour': 365, 'day': 2000,
+}
+
+# Symbols extracted concurrently in batch mode (API calls still share the rate limiter below)
+BATCH_MAX_WORKERS = 8
+
+# Kite allows ~3 historical-data requests per second per API key
+HISTORICAL_REQUESTS_PER_SEC = 3
+HISTORICAL_MAX_WORKERS = 3
+
+_historical_rate_lock = threading.Lock()
+_historical_next_slot = 0.0
+
+def _wait_for_historical_slot():
+    """Block until the next historical-data request slot is free (shared by all threads)"""
+    global _historical_next_slot
+    with _historical_rate_lock:
+        now = time.monotonic()
+        wait = _historical_next_slot - now
+        _historical_next_slot = max(now, _historical_next_slot) + 1.0 / HISTORICAL_REQUESTS_PER_SEC
+    if wait > 0:
+        time.sleep(wait)
+
+class _ChunkSink:
+    """
+    Collects chunk DataFrames of a chunked download in arrival order
+    
+    With pyarrow installed each chunk is appended as a row group to a temporary
+    parquet file in output_dir and released, so only one chunk is held in memory
+    until the final read. Without pyarrow the chunks are kept in a list and
+    concatenated at the end.
+    """
+    
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.chunk_count = 0
+        self._frames = []
+        self._writer = None
+        self._path = None
+    
+    def append(self, df):
+        self.chunk_count += 1
+        if pa is None:
+            self._frames.append(df)
+            return
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            fd, self._path = tempfile.mkstemp(prefix='.chunks_', suffix='.parquet', dir=self.output_dir)
+            os.close(fd)
+            self._writer = pq.ParquetWriter(self._path, table.schema, version='2.6')
+        self._writer.write_table(table.cast(self._writer.schema))
+    
+    def collect(self):
+        """Return all appended chunks as one DataFrame, or None if nothing was appended"""
+        if self.chunk_count == 0:
+            return None
+        if pa is None:
+            return pd.concat(self._frames, ignore_index=True)
+        
+        self._writer.close()
+        self._writer = None
+        return pq.read_table(self._path).to_pandas()
+    
+    def close(self):
+        """Release the parquet writer and remove the temporary file"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+        self._frames = []
+
+
+class _ThreadBufferedStdout:
+    """
+    sys.stdout stand-in that captures the prints of threads which opt in
+    
+    A thread that calls start_capture() has its output collected until
+    end_capture() returns it, so concurrent batch workers can each report as
+    one block; all other threads write straight through to the real stream.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def start_capture(self):
+        self._local.buffer = io.StringIO()
+    
+    def end_capture(self):
+        buffer = self._local.__dict__.pop('buffer', None)
+        return buffer.getvalue() if buffer is not None else ''
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
 class DataExtractor:
     """
     Main Data Extraction Class
@@ -59,6 +206,15 @@ class DataExtractor:
         self.api_key = os.environ["KITE_API_KEY"]
         self.kite = KiteConnect(api_key=self.api_key)
         self.kite.set_access_token(self.access_token)
+        self._configure_session()
+        
+        # Instrument dumps per exchange (plus DataFrame and symbol index views),
+        # fetched once and reused by the lookup helpers
+        self._instruments_cache = {}
+        self._instruments_df = {}
+        self._symbol_index = {}
+        self._instruments_lock = threading.Lock()
+        self._profile = None
         
         # Create output directory
         self.output_dir = os.getenv("OUTPUT_DIR", os.path.join(os.getcwd(), "kite_data_output"))
@@ -67,6 +223,22 @@ class DataExtractor:
         print("✅ Data Extractor initialized successfully!")
         print(f"📁 Output directory: {os.path.abspath(self.output_dir)}")
     
+    def _configure_session(self):
+        """
+        Attach a persistent keep-alive session to the Kite client
+        
+        Reuses TCP/TLS connections across the sequential API calls of a chunked
+        fetch, and retries rate-limited (429) or transient 5xx responses with
+        backoff, honouring any Retry-After header.
+        """
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        self.kite.reqsession = session
+    
     def _create_output_directory(self):
         """Create output directory if it doesn't exist"""
         if not os.path.exists(self.output_dir):
@@ -76,14 +248,114 @@ class DataExtractor:
             print(f"📁 Using existing output directory: {self.output_dir}")
     
     def verify_connection(self):
-        """Verify API connection"""
+        """Verify API connection (opt-in via DX_VERIFY=1; the profile is fetched once)"""
+        if os.getenv("DX_VERIFY", "0") != "1":
+            return
+        
         try:
-            profile = self.kite.profile()
+            if self._profile is None:
+                self._profile = self.kite.profile()
+            profile = self._profile
             print(f"👤 Connected as: {profile.get('user_name', 'Unknown')}")
             print(f"📧 Email: {profile.get('email', 'N/A')}")
         except Exception as e:
             print(f"❌ Connection verification failed: {e}")
     
+    def _get_instruments(self, exchange):
+        """
+        Get the instrument list for an exchange, downloading it only once
+        
+        Args:
+            exchange (str): Exchange (NSE, BSE, INDICES, ...)
+            
+        Returns:
+            list: Instrument dicts as returned by kite.instruments()
+        """
+        if exchange not in self._instruments_cache:
+            # Serialized so a background preload and a lookup never download it twice
+            with self._instruments_lock:
+                if exchange not in self._instruments_cache:
+                    self._instruments_cache[exchange] = self._load_instruments_from_disk_or_api(exchange)
+        return self._instruments_cache[exchange]
+    
+    def preload_instruments(self, exchange="NSE"):
+        """
+        Load an exchange's instrument dump and symbol index in a background thread
+        
+        Lets the download overlap with interactive input; a lookup made before
+        it finishes simply waits for it.
+        
+        Returns:
+            threading.Thread: The started loader thread
+        """
+        def load():
+            try:
+                self._get_symbol_index(exchange)
+            except Exception:
+                # The next foreground lookup retries and reports the error
+                pass
+        
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        return thread
+    
+    def _load_instruments_from_disk_or_api(self, exchange):
+        """
+        Load today's instrument dump from the on-disk cache, downloading it if missing
+        
+        Zerodha regenerates the dump once per trading day, so it is cached as
+        .instruments_cache_{exchange}_{YYYY-MM-DD}.pq in the output directory
+        and older cache files for the exchange are removed.
+        """
+        cache_path = os.path.join(self.output_dir, f".instruments_cache_{exchange}_{date.today()}.pq")
+        
+        if os.path.exists(cache_path):
+            try:
+                return pd.read_parquet(cache_path).to_dict('records')
+            except Exception as e:
+                print(f"⚠️  Ignoring unreadable instruments cache {cache_path}: {e}")
+        
+        instruments = self.kite.instruments(exchange)
+        
+        try:
+            tmp_path = cache_path + ".tmp"
+            pd.DataFrame(instruments).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, cache_path)
+            
+            # Also clears the .pkl caches written by earlier versions
+            for pattern in (f".instruments_cache_{exchange}_*.pq", f".instruments_cache_{exchange}_*.pkl"):
+                for stale_path in glob.glob(os.path.join(self.output_dir, pattern)):
+                    if stale_path != cache_path:
+                        os.remove(stale_path)
+        except Exception as e:
+            # Unwritable directory, pyarrow missing, or columns parquet can't store
+            print(f"⚠️  Could not write instruments cache: {e}")
+        
+        return instruments
+    
+    def _get_instruments_df(self, exchange):
+        """Get the instrument list for an exchange as a DataFrame (built once)"""
+        if exchange not in self._instruments_df:
+            df = pd.DataFrame(self._get_instruments(exchange))
+            # Lowercased once so case-insensitive searches don't re-fold every symbol
+            df['_ts_lower'] = df['tradingsymbol'].str.lower()
+            self._instruments_df[exchange] = df
+        return self._instruments_df[exchange]
+    
+    def _get_symbol_index(self, exchange):
+        """Get a {tradingsymbol: instrument} index for an exchange (built once)"""
+        if exchange not in self._symbol_index:
+            self._symbol_index[exchange] = {
+                instrument['tradingsymbol']: instrument
+                for instrument in self._get_instruments(exchange)
+            }
+        return self._symbol_index[exchange]
+    
+    def _first_match(self, exchange, mask):
+        """Return the first instrument of an exchange where mask is True, or None"""
+        hits = np.flatnonzero(mask.to_numpy())
+        return self._get_instruments(exchange)[hits[0]] if hits.size else None
+    
     def search_instrument(self, symbol, exchange="NSE"):
         """
         Search for instrument by symbol
@@ -97,19 +369,18 @@ class DataExtractor:
         """
         try:
             print(f"🔍 Searching for {symbol} on {exchange}...")
-            instruments = self.kite.instruments(exchange)
             
             # Search for exact match first
-            for instrument in instruments:
-                if instrument['tradingsymbol'] == symbol:
-                    print(f"✅ Found exact match: {instrument['name']} (Token: {instrument['instrument_token']})")
-                    return instrument
+            instrument = self._get_symbol_index(exchange).get(symbol)
+            if instrument is not None:
+                print(f"✅ Found exact match: {instrument['name']} (Token: {instrument['instrument_token']})")
+                return instrument
             
             # Search for partial match
-            matches = []
-            for instrument in instruments:
-                if symbol.lower() in instrument['tradingsymbol'].lower():
-                    matches.append(instrument)
+            instruments = self._get_instruments(exchange)
+            df = self._get_instruments_df(exchange)
+            mask = df['_ts_lower'].str.contains(symbol.lower(), regex=False, na=False)
+            matches = [instruments[i] for i in np.flatnonzero(mask.to_numpy())]
             
             if matches:
                 print(f"📋 Found {len(matches)} partial matches:")
@@ -132,11 +403,12 @@ class DataExtractor:
     def get_nifty50_token(self):
         """Get NIFTY 50 instrument token"""
         try:
-            instruments = self.kite.instruments("INDICES")
-            for instrument in instruments:
-                if "NIFTY 50" in instrument['name'] or instrument['tradingsymbol'] == "NIFTY 50":
-                    print(f"✅ Found NIFTY 50: Token = {instrument['instrument_token']}")
-                    return instrument['instrument_token']
+            df = self._get_instruments_df("INDICES")
+            mask = df['name'].str.contains("NIFTY 50", regex=False, na=False) | (df['tradingsymbol'] == "NIFTY 50")
+            instrument = self._first_match("INDICES", mask)
+            if instrument is not None:
+                print(f"✅ Found NIFTY 50: Token = {instrument['instrument_token']}")
+                return instrument['instrument_token']
             
             # Fallback to standard token
             print("⚠️  Using standard NIFTY 50 token: 256265")
@@ -149,11 +421,13 @@ class DataExtractor:
     def get_banknifty_token(self):
         """Get BANK NIFTY instrument token"""
         try:
-            instruments = self.kite.instruments("INDICES")
-            for instrument in instruments:
-                if "NIFTY BANK" in instrument['name'] or "BANKNIFTY" in instrument['tradingsymbol']:
-                    print(f"✅ Found BANK NIFTY: Token = {instrument['instrument_token']}")
-                    return instrument['instrument_token']
+            df = self._get_instruments_df("INDICES")
+            mask = (df['name'].str.contains("NIFTY BANK", regex=False, na=False) |
+                    df['tradingsymbol'].str.contains("BANKNIFTY", regex=False, na=False))
+            instrument = self._first_match("INDICES", mask)
+            if instrument is not None:
+                print(f"✅ Found BANK NIFTY: Token = {instrument['instrument_token']}")
+                return instrument['instrument_token']
             
             # Fallback to standard token
             print("⚠️  Using standard BANK NIFTY token: 260105")
@@ -166,19 +440,18 @@ class DataExtractor:
     def get_indiavix_token(self):
         """Get INDIA VIX instrument token"""
         try:
-            # Check NSE first
-            instruments = self.kite.instruments("NSE")
-            for instrument in instruments:
-                if "INDIAVIX" in instrument['tradingsymbol'] or "VIX" in instrument['tradingsymbol']:
-                    print(f"✅ Found INDIA VIX: Token = {instrument['instrument_token']}")
-                    return instrument['instrument_token']
+            # Check NSE first ("VIX" also covers "INDIAVIX")
+            df = self._get_instruments_df("NSE")
+            instrument = self._first_match("NSE", df['tradingsymbol'].str.contains("VIX", regex=False, na=False))
             
             # Check INDICES
-            instruments = self.kite.instruments("INDICES")
-            for instrument in instruments:
-                if "INDIAVIX" in instrument['name'] or "VIX" in instrument['name']:
-                    print(f"✅ Found INDIA VIX: Token = {instrument['instrument_token']}")
-                    return instrument['instrument_token']
+            if instrument is None:
+                df = self._get_instruments_df("INDICES")
+                instrument = self._first_match("INDICES", df['name'].str.contains("VIX", regex=False, na=False))
+            
+            if instrument is not None:
+                print(f"✅ Found INDIA VIX: Token = {instrument['instrument_token']}")
+                return instrument['instrument_token']
             
             # Fallback to standard token
             print("⚠️  Using standard INDIA VIX token: 264969")
@@ -214,12 +487,42 @@ class DataExtractor:
             pd.DataFrame: DataFrame with timezone-naive dates
         """
         if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
-            if df['date'].dt.tz is not None:
-                df['date'] = df['date'].dt.tz_localize(None)
+            col = df['date']
+            # Only parse/convert when needed, so repeated calls on a naive column are no-ops
+            if not pd.api.types.is_datetime64_any_dtype(col):
+                col = pd.to_datetime(col)
+                df['date'] = col
+            if col.dt.tz is not None:
+                df['date'] = col.dt.tz_localize(None)
         return df
     
-    def fetch_historical_data_chunked(self, instrument_token, from_date, to_date, interval="day"):
+    def _filter_after_market_close(self, df, market_close_today=None):
+        """
+        Drop records after today's market close (3:30 PM), including future dates
+        
+        Everything up to today's close is valid, so a single comparison against
+        that cutoff replaces separate per-row date and time checks.
+        
+        Args:
+            df (pd.DataFrame): DataFrame with timezone-naive date column
+            market_close_today (datetime, optional): Precomputed close time for today
+            
+        Returns:
+            pd.DataFrame: Filtered data
+        """
+        if market_close_today is None:
+            market_close_today = self.get_market_end_time(datetime.now())
+        cutoff = np.datetime64(market_close_today)
+        
+        initial_count = len(df)
+        df = df[df['date'].to_numpy() <= cutoff]
+        
+        filtered_count = initial_count - len(df)
+        if filtered_count > 0:
+            print(f"⏰ Filtered out {filtered_count} records after market close (3:30 PM)")
+        return df
+    
+    def fetch_historical_data_chunked(self, instrument_token, from_date, to_date, interval="day", max_workers=HISTORICAL_MAX_WORKERS):
         """
         Fetch historical data in chunks for large datasets
         
@@ -228,16 +531,17 @@ class DataExtractor:
             from_date (datetime): Start date
             to_date (datetime): End date
             interval (str): Data interval
+            max_workers (int): Chunks fetched concurrently (1 fetches them in order on this thread)
             
         Returns:
             pd.DataFrame: Combined historical data
         """
         # For intraday data, don't fetch beyond market close time for today
         current_time = datetime.now()
+        market_close_today = self.get_market_end_time(current_time)
         if interval != "day" and to_date.date() >= current_time.date():
             # If end date is today or future, cap it at current time or market close
-            market_close_today = self.get_market_end_time(current_time)
-            if current_time.time() > market_close_today.time():
+            if current_time > market_close_today:
                 # After market hours, set end time to market close
                 to_date = market_close_today
             else:
@@ -247,18 +551,7 @@ class DataExtractor:
             print(f"📍 Note: Indian stock market closes at 3:30 PM IST")
         
         # Determine chunk size based on interval
-        if interval in ['minute']:
-            chunk_days = 5  # 5 days at a time for minute data
-        elif interval in ['3minute', '5minute']:
-            chunk_days = 60  # 60 days at a time for 5-minute data
-        elif interval in ['10minute', '15minute']:
-            chunk_days = 60
-        elif interval in ['30minute']:
-            chunk_days = 100
-        elif interval in ['hour']:
-            chunk_days = 365
-        else:  # daily
-            chunk_days = 2000
+        chunk_days = CHUNK_DAYS.get(interval, CHUNK_DAYS['day'])
         
         total_days = (to_date - from_date).days
         
@@ -270,66 +563,110 @@ class DataExtractor:
         print(f"📦 Large dataset detected: {total_days} days")
         print(f"🔄 Will fetch in chunks of {chunk_days} days each")
         
-        all_data = []
+        # Build all chunk windows up front so they can be fetched concurrently
+        windows = []
         current_start = from_date
-        chunk_count = 0
-        
         while current_start < to_date:
-            chunk_count += 1
             current_end = min(current_start + timedelta(days=chunk_days), to_date)
+            windows.append((current_start, current_end))
+            current_start = current_end
+        
+        # Requests are network-bound; a few workers overlap their latency while
+        # _wait_for_historical_slot keeps the overall rate within Kite's limit
+        window_bounds = [(np.datetime64(start), np.datetime64(end)) for start, end in windows]
+        chunk_args = [
+            (chunk_count, instrument_token, chunk_start, chunk_end, interval)
+            for chunk_count, (chunk_start, chunk_end) in enumerate(windows, 1)
+        ]
+        executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        sink = _ChunkSink(self.output_dir)
+        try:
+            # Results arrive in window order either way
+            if executor is not None:
+                chunk_results = executor.map(lambda args: self._fetch_chunk(*args), chunk_args)
+            else:
+                chunk_results = (self._fetch_chunk(*args) for args in chunk_args)
             
-            print(f"📥 Fetching chunk {chunk_count}: {current_start.date()} to {current_end.date()}")
-            
-            try:
-                chunk_data = self.fetch_historical_data(instrument_token, current_start, current_end, interval)
-                
-                if not chunk_data.empty:
-                    all_data.append(chunk_data)
-                    print(f"✅ Chunk {chunk_count}: {len(chunk_data)} records")
-                else:
-                    print(f"⚠️  Chunk {chunk_count}: No data returned")
-                
-                # Rate limiting - wait between requests
-                time.sleep(0.5)
+            for chunk_index, chunk_data in enumerate(chunk_results):
+                if chunk_data.empty:
+                    continue
                 
-            except Exception as e:
-                print(f"❌ Error fetching chunk {chunk_count}: {e}")
-                # Continue with next chunk
-            
-            current_start = current_end + timedelta(days=1)
+                # Adjacent windows share a boundary; keep each record in exactly one
+                # half-open window [start, end) so no de-duplication pass is needed
+                chunk_data = self.ensure_timezone_naive(chunk_data)
+                dates = chunk_data['date'].to_numpy()
+                keep = np.ones(len(dates), dtype=bool)
+                if chunk_index > 0:
+                    keep &= dates >= window_bounds[chunk_index][0]
+                if chunk_index < len(windows) - 1:
+                    keep &= dates < window_bounds[chunk_index][1]
+                sink.append(chunk_data[keep])
+            
+            # Chunks are disjoint and collected in window order, so no dedup or sort is needed
+            combined_df = sink.collect()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            sink.close()
         
         # Combine all chunks
-        if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            # Remove duplicates that might occur at chunk boundaries
-            combined_df = combined_df.drop_duplicates(subset=['date'])
-            combined_df = combined_df.sort_values('date').reset_index(drop=True)
-            
+        if combined_df is not None:
             # Filter out any data after market close for today
             if interval != "day":
                 # Ensure timezone-naive for comparison
                 combined_df = self.ensure_timezone_naive(combined_df)
                 
-                current_date = datetime.now().date()
-                market_close_today = self.get_market_end_time(datetime.now())
-                
                 # Filter out future data or data after market close today
-                initial_count = len(combined_df)
-                combined_df = combined_df[
-                    (combined_df['date'].dt.date < current_date) | 
-                    ((combined_df['date'].dt.date == current_date) & (combined_df['date'] <= market_close_today))
-                ]
-                
-                filtered_count = initial_count - len(combined_df)
-                if filtered_count > 0:
-                    print(f"⏰ Filtered out {filtered_count} records after market close (3:30 PM)")
+                combined_df = self._filter_after_market_close(combined_df, market_close_today)
             
-            print(f"🎉 Successfully combined {len(all_data)} chunks into {len(combined_df)} total records")
+            print(f"🎉 Successfully combined {sink.chunk_count} chunks into {len(combined_df)} total records")
             return combined_df
         else:
             print("❌ No data retrieved from any chunk")
             return pd.DataFrame()
     
+    def _fetch_chunk(self, chunk_count, instrument_token, from_date, to_date, interval):
+        """Fetch one chunk of a chunked request, returning an empty DataFrame on failure"""
+        print(f"📥 Fetching chunk {chunk_count}: {from_date.date()} to {to_date.date()}")
+        
+        try:
+            chunk_data = self.fetch_historical_data(instrument_token, from_date, to_date, interval)
+            
+            if not chunk_data.empty:
+                print(f"✅ Chunk {chunk_count}: {len(chunk_data)} records")
+            else:
+                print(f"⚠️  Chunk {chunk_count}: No data returned")
+            return chunk_data
+            
+        except Exception as e:
+            print(f"❌ Error fetching chunk {chunk_count}: {e}")
+            return pd.DataFrame()
+    
+    def _candles_to_frame(self, candles):
+        """
+        Build a DataFrame from Kite candles with explicit column dtypes
+        
+        Skips pandas' per-column type inference on the list of dicts and strips
+        the timezone while building the date column, so the result is already
+        timezone-naive (IST wall-clock time).
+        
+        Args:
+            candles (list): Candle dicts from kite.historical_data()
+            
+        Returns:
+            pd.DataFrame: Candle data
+        """
+        n = len(candles)
+        columns = {
+            'date': np.array([candle['date'].replace(tzinfo=None) for candle in candles], dtype='datetime64[ns]')
+        }
+        fields = dict(CANDLE_DTYPES)
+        if 'oi' in candles[0]:
+            fields['oi'] = np.int64
+        for field, dtype in fields.items():
+            columns[field] = np.fromiter((candle[field] for candle in candles), dtype=dtype, count=n)
+        return pd.DataFrame(columns, copy=False)
+    
     def fetch_historical_data(self, instrument_token, from_date, to_date, interval="day"):
         """
         Fetch historical data (single request)
@@ -346,9 +683,9 @@ class DataExtractor:
         try:
             # For intraday data, don't fetch beyond market close time for today
             current_time = datetime.now()
+            market_close_today = self.get_market_end_time(current_time)
             if interval != "day" and to_date.date() >= current_time.date():
-                market_close_today = self.get_market_end_time(current_time)
-                if current_time.time() > market_close_today.time():
+                if current_time > market_close_today:
                     # After market hours, set end time to market close
                     to_date = market_close_today
                 else:
@@ -361,6 +698,7 @@ class DataExtractor:
             if interval != "day":
                 print(f"📍 Note: Fetching intraday data (market hours: 9:15 AM - 3:30 PM IST)")
             
+            _wait_for_historical_slot()
             historical_data = self.kite.historical_data(
                 instrument_token=instrument_token,
                 from_date=from_date,
@@ -369,7 +707,7 @@ class DataExtractor:
             )
             
             if historical_data:
-                df = pd.DataFrame(historical_data)
+                df = self._candles_to_frame(historical_data)
                 print(f"✅ API returned {len(df)} records")
                 print(f"📊 Columns: {list(df.columns)}")
                 if len(df) > 0:
@@ -380,18 +718,11 @@ class DataExtractor:
                     # Ensure timezone-naive for comparison
                     df = self.ensure_timezone_naive(df)
                     
-                    current_date = datetime.now().date()
-                    market_close = self.get_market_end_time(datetime.now())
-                    
-                    initial_count = len(df)
-                    df = df[
-                        (df['date'].dt.date < current_date) | 
-                        ((df['date'].dt.date == current_date) & (df['date'] <= market_close))
-                    ]
-                    
-                    filtered_count = initial_count - len(df)
-                    if filtered_count > 0:
-                        print(f"⏰ Filtered out {filtered_count} records after market close (3:30 PM)")
+                    df = self._filter_after_market_close(df, market_close_today)
+                
+                # Optionally halve memory and I/O: prices fit float32, volumes fit uint32
+                if os.getenv("DX_FLOAT32") == "1":
+                    df = df.astype(COMPACT_OHLCV_DTYPES)
                 
                 return df
             else:
@@ -424,37 +755,51 @@ class DataExtractor:
         df = self.ensure_timezone_naive(df)
         
         # Filter out any data after market close (3:30 PM) for today
-        current_date = datetime.now().date()
-        market_close_today = self.get_market_end_time(datetime.now())
-        
-        # Remove any data after market close for today
-        initial_count = len(df)
-        df = df[
-            (df['date'].dt.date < current_date) | 
-            ((df['date'].dt.date == current_date) & (df['date'] <= market_close_today))
-        ]
-        
-        filtered_count = initial_count - len(df)
-        if filtered_count > 0:
-            print(f"⏰ Filtered out {filtered_count} records after market close time (3:30 PM)")
-        
-        # Add calculated fields
-        df['price_change'] = df['close'] - df['open']
-        df['price_change_pct'] = (df['price_change'] / df['open']) * 100
-        df['high_low_range'] = df['high'] - df['low']
-        df['range_pct'] = (df['high_low_range'] / df['open']) * 100
-        
-        # Add time-based fields
-        df['day_of_week'] = df['date'].dt.day_name()
-        df['month'] = df['date'].dt.month
-        df['year'] = df['date'].dt.year
+        df = self._filter_after_market_close(df)
+        
+        # Add calculated fields in one pass over the raw OHLC arrays, rounded to 2 decimals
+        prices = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64).T
+        open_, high, low, close = prices
+        price_change = close - open_
+        high_low_range = high - low
+        derived = np.round(np.stack([
+            price_change,
+            price_change / open_ * 100,
+            high_low_range,
+            high_low_range / open_ * 100
+        ]), 2)
+        
+        # Rounded prices keep their dtype; with DX_FLOAT32=1 everything is float32
+        compact = os.getenv("DX_FLOAT32") == "1"
+        if compact:
+            derived = derived.astype(np.float32)
+        rounded_prices = {
+            col: values.astype(np.float32 if compact else df[col].dtype, copy=False)
+            for col, values in zip(['open', 'high', 'low', 'close'], np.round(prices, 2))
+        }
         
-        # Round numerical columns
-        numeric_cols = ['open', 'high', 'low', 'close', 'price_change', 'price_change_pct', 'high_low_range', 'range_pct']
-        df[numeric_cols] = df[numeric_cols].round(2)
+        # Date parts straight from the datetime64 buffer (1970-01-01 was a Thursday)
+        dates = df['date'].to_numpy(dtype='datetime64[ns]')
+        days = dates.astype('datetime64[D]').view(np.int64)
+        months = dates.astype('datetime64[M]').view(np.int64)
+        
+        # Single assign for all derived columns (weekday names stored as int8 category codes)
+        df = df.assign(
+            **rounded_prices,
+            price_change=derived[0],
+            price_change_pct=derived[1],
+            high_low_range=derived[2],
+            range_pct=derived[3],
+            day_of_week=pd.Categorical.from_codes(((days + 3) % 7).astype(np.int8), categories=WEEKDAY_NAMES),
+            month=(months % 12 + 1).astype(np.int8),
+            year=(months // 12 + 1970).astype(np.int16)
+        )
         
-        # Sort by date
-        df = df.sort_values('date').reset_index(drop=True)
+        # Sort by date (Kite returns candles in order, so usually only the index is reset)
+        if df['date'].is_monotonic_increasing:
+            df = df.reset_index(drop=True)
+        else:
+            df = df.sort_values('date', kind='mergesort', ignore_index=True)
         
         print(f"📊 {symbol_name} Data Summary:")
         print(f"   📈 Records: {len(df)}")
@@ -464,28 +809,55 @@ class DataExtractor:
         
         return df
     
-    def save_data(self, df, filename, symbol_name="Data"):
-        """Save data to CSV file in output directory"""
+    def get_output_path(self, filename, fmt=None):
+        """
+        Get the output path for filename, with the extension of the output format
+        
+        Args:
+            filename (str): Base filename (any existing extension is replaced)
+            fmt (str, optional): 'parquet', 'feather' or 'csv' (default: DX_FORMAT)
+            
+        Returns:
+            tuple: (output_path, fmt)
+        """
+        fmt = (fmt or DEFAULT_OUTPUT_FORMAT).lower()
+        if fmt not in OUTPUT_EXTENSIONS or (fmt != 'csv' and pa is None):
+            fmt = 'csv'
+        
+        base_name = os.path.splitext(filename)[0]
+        return os.path.join(self.output_dir, base_name + OUTPUT_EXTENSIONS[fmt]), fmt
+    
+    def save_data(self, df, filename, symbol_name="Data", fmt=None):
+        """Save data to a parquet, feather or CSV file in output directory"""
         
         # Check if DataFrame is empty
         if df.empty:
             print(f"❌ Cannot save {symbol_name}: DataFrame is empty!")
             return False
-            
-        print(f"💾 Saving {len(df)} records to CSV...")
+        
+        output_path, fmt = self.get_output_path(filename, fmt)
+        print(f"💾 Saving {len(df)} records to {fmt.upper()}...")
         
         try:
             # Ensure timezone-naive dates before saving
             df = self.ensure_timezone_naive(df)
             
-            # Ensure .csv extension
-            csv_filename = filename.replace('.xlsx', '.csv')
-            
-            # Create full path in output directory
-            output_path = os.path.join(self.output_dir, csv_filename)
-            
-            # Save to CSV
-            df.to_csv(output_path, index=False)
+            # Columnar formats are written straight from the column buffers
+            if fmt == 'parquet':
+                df.to_parquet(output_path, engine='pyarrow', compression='snappy', index=False)
+            elif fmt == 'feather':
+                df.reset_index(drop=True).to_feather(output_path, compression='lz4')
+            # Save to CSV (multi-threaded C++ writer when pyarrow is available)
+            elif pa is not None:
+                pacsv.write_csv(
+                    pa.Table.from_pandas(df, preserve_index=False),
+                    output_path,
+                    write_options=pacsv.WriteOptions(batch_size=65536)
+                )
+            else:
+                # 1 MB buffer so pandas' row chunks don't turn into many small writes
+                with open(output_path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                    df.to_csv(f, index=False)
             
             # Get file size
             file_size = os.path.getsize(output_path)
@@ -504,7 +876,7 @@ class DataExtractor:
             return True
             
         except Exception as e:
-            print(f"❌ Error saving CSV file: {e}")
+            print(f"❌ Error saving {fmt.upper()} file: {e}")
             return False
     
     def display_data_sample(self, df, symbol_name="Stock", num_rows=5):
@@ -523,11 +895,19 @@ class DataExtractor:
         display_cols = ['date', 'open', 'high', 'low', 'close', 'volume', 'price_change', 'price_change_pct']
         sample_df = df[display_cols].head(num_rows)
         
-        for _, row in sample_df.iterrows():
-            date_str = row['date'].strftime('%Y-%m-%d %H:%M:%S')
-            change_emoji = "📈" if row['price_change'] >= 0 else "📉"
-            print(f"{date_str} | O:{row['open']:8.2f} | H:{row['high']:8.2f} | L:{row['low']:8.2f} | "
-                  f"C:{row['close']:8.2f} | Vol:{row['volume']:12,} | {change_emoji} {row['price_change']:+7.2f} ({row['price_change_pct']:+6.2f}%)")
+        # Format whole columns at once and print all rows in one write
+        change_emoji = np.where(sample_df['price_change'].to_numpy() >= 0, "📈", "📉")
+        lines = (
+            sample_df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+            + " | O:" + sample_df['open'].map('{:8.2f}'.format)
+            + " | H:" + sample_df['high'].map('{:8.2f}'.format)
+            + " | L:" + sample_df['low'].map('{:8.2f}'.format)
+            + " | C:" + sample_df['close'].map('{:8.2f}'.format)
+            + " | Vol:" + sample_df['volume'].map('{:12,}'.format)
+            + " | " + change_emoji + " " + sample_df['price_change'].map('{:+7.2f}'.format)
+            + " (" + sample_df['price_change_pct'].map('{:+6.2f}'.format) + "%)"
+        )
+        print("\n".join(lines.tolist()))
         
         print("=" * 100)
     
@@ -544,14 +924,14 @@ class DataExtractor:
         
         # Available intervals with descriptions
         intervals = {
-            "1": {"interval": "minute", "name": "1 Minute", "desc": "Every minute data", "max_days": 60, "chunk_days": 5},
-            "2": {"interval": "3minute", "name": "3 Minutes", "desc": "Every 3 minutes", "max_days": 200, "chunk_days": 15},
-            "3": {"interval": "5minute", "name": "5 Minutes", "desc": "Every 5 minutes", "max_days": 2000, "chunk_days": 60},
-            "4": {"interval": "10minute", "name": "10 Minutes", "desc": "Every 10 minutes", "max_days": 2000, "chunk_days": 60},
-            "5": {"interval": "15minute", "name": "15 Minutes", "desc": "Every 15 minutes", "max_days": 2000, "chunk_days": 60},
-            "6": {"interval": "30minute", "name": "30 Minutes", "desc": "Every 30 minutes", "max_days": 2000, "chunk_days": 100},
-            "7": {"interval": "hour", "name": "1 Hour", "desc": "Hourly data", "max_days": 2000, "chunk_days": 365},
-            "8": {"interval": "day", "name": "1 Day", "desc": "Daily OHLC data", "max_days": 2000, "chunk_days": 2000}
+            "1": {"interval": "minute", "name": "1 Minute", "desc": "Every minute data", "max_days": 60, "chunk_days": CHUNK_DAYS['minute']},
+            "2": {"interval": "3minute", "name": "3 Minutes", "desc": "Every 3 minutes", "max_days": 200, "chunk_days": CHUNK_DAYS['3minute']},
+            "3": {"interval": "5minute", "name": "5 Minutes", "desc": "Every 5 minutes", "max_days": 2000, "chunk_days": CHUNK_DAYS['5minute']},
+            "4": {"interval": "10minute", "name": "10 Minutes", "desc": "Every 10 minutes", "max_days": 2000, "chunk_days": CHUNK_DAYS['10minute']},
+            "5": {"interval": "15minute", "name": "15 Minutes", "desc": "Every 15 minutes", "max_days": 2000, "chunk_days": CHUNK_DAYS['15minute']},
+            "6": {"interval": "30minute", "name": "30 Minutes", "desc": "Every 30 minutes", "max_days": 2000, "chunk_days": CHUNK_DAYS['30minute']},
+            "7": {"interval": "hour", "name": "1 Hour", "desc": "Hourly data", "max_days": 2000, "chunk_days": CHUNK_DAYS['hour']},
+            "8": {"interval": "day", "name": "1 Day", "desc": "Daily OHLC data", "max_days": CHUNK_DAYS['day'], "chunk_days": CHUNK_DAYS['day']}
         }
         
         print("📊 AVAILABLE TIME INTERVALS:")
@@ -645,7 +1025,7 @@ class DataExtractor:
         
         return days, selected_interval['interval'], description
     
-    def extract_stock_data(self, symbol, exchange="NSE", days=30, interval="day"):
+    def extract_stock_data(self, symbol, exchange="NSE", days=30, interval="day", fmt=None, chunk_workers=HISTORICAL_MAX_WORKERS):
         """
         Extract data for a specific stock
         
@@ -654,6 +1034,8 @@ class DataExtractor:
             exchange (str): Exchange (NSE, BSE)
             days (int): Number of days of data
             interval (str): Data interval
+            fmt (str, optional): Output file format (default: DX_FORMAT)
+            chunk_workers (int): Chunks of a large request fetched concurrently
             
         Returns:
             pd.DataFrame: Stock data
@@ -678,7 +1060,8 @@ class DataExtractor:
             instrument_token=instrument['instrument_token'],
             from_date=start_date,
             to_date=end_date,
-            interval=interval
+            interval=interval,
+            max_workers=chunk_workers
         )
         
         if not df.empty:
@@ -691,7 +1074,7 @@ class DataExtractor:
             
             # Save data with validation
             filename = f"{symbol.lower()}_{days}days_{interval}.csv"
-            if self.save_data(df, filename, symbol):
+            if self.save_data(df, filename, symbol, fmt):
                 print(f"✅ {symbol} data extraction completed successfully!")
             else:
                 print(f"❌ Failed to save {symbol} data")
@@ -706,13 +1089,14 @@ class DataExtractor:
             print("   - Market holidays/weekends only in date range")
             return pd.DataFrame()
     
-    def extract_nifty50_data(self, days=30, interval="day"):
+    def extract_nifty50_data(self, days=30, interval="day", fmt=None):
         """
         Extract NIFTY 50 index data
         
         Args:
             days (int): Number of days of data
             interval (str): Data interval (day, 5minute, etc.)
+            fmt (str, optional): Output file format (default: DX_FORMAT)
             
         Returns:
             pd.DataFrame: NIFTY 50 data
@@ -747,7 +1131,7 @@ class DataExtractor:
             
             # Save data with validation
             filename = f"nifty50_{days}days_{interval}.csv"
-            if self.save_data(df, filename, "NIFTY 50"):
+            if self.save_data(df, filename, "NIFTY 50", fmt):
                 print(f"✅ NIFTY 50 data extraction completed successfully!")
             else:
                 print(f"❌ Failed to save NIFTY 50 data")
@@ -798,13 +1182,13 @@ class DataExtractor:
                 print("📊 Sample data:")
                 print(df.head().to_string())
                 
-                # Test saving to CSV
+                # Test saving to the output directory
                 test_filename = "test_reliance.csv"
                 if self.save_data(df, test_filename, "RELIANCE_TEST"):
-                    print(f"✅ CSV save test successful!")
-                    print(f"🔍 Check the file: {os.path.join(self.output_dir, test_filename)}")
+                    print(f"✅ Save test successful!")
+                    print(f"🔍 Check the file: {self.get_output_path(test_filename)[0]}")
                 else:
-                    print(f"❌ CSV save test failed")
+                    print(f"❌ Save test failed")
                     
                 # Test with 5-minute data
                 print("\n🔍 Testing 5-minute data extraction...")
@@ -824,10 +1208,10 @@ class DataExtractor:
                     print(f"📅 Latest timestamp: {df_5min['date'].max()}")
                     
                     # Check if any data is after market close
-                    market_close = self.get_market_end_time(datetime.now())
-                    after_close = df_5min[df_5min['date'] > market_close]
-                    if len(after_close) > 0:
-                        print(f"⚠️  Found {len(after_close)} records after market close!")
+                    market_close = self.get_market_end_time(end_date)
+                    after_close = np.count_nonzero(df_5min['date'].to_numpy() > np.datetime64(market_close))
+                    if after_close:
+                        print(f"⚠️  Found {after_close} records after market close!")
                     else:
                         print("✅ No data after market close (3:30 PM)")
                         
@@ -839,6 +1223,191 @@ class DataExtractor:
             import traceback
             traceback.print_exc()
 
+# Quick-pick stocks of main()'s popular stocks menu
+POPULAR_STOCKS = {
+    "1": {"symbol": "RELIANCE", "name": "Reliance Industries"},
+    "2": {"symbol": "TCS", "name": "Tata Consultancy Services"},
+    "3": {"symbol": "HDFCBANK", "name": "HDFC Bank"},
+    "4": {"symbol": "INFY", "name": "Infosys"},
+    "5": {"symbol": "ADANIPORTS", "name": "Adani Ports"},
+    "6": {"symbol": "SBIN", "name": "State Bank of India"},
+    "7": {"symbol": "ITC", "name": "ITC Limited"},
+    "8": {"symbol": "LT", "name": "Larsen & Toubro"}
+}
+
+# Top-level menu of main(), printed in one call
+EXTRACTION_MENU = "\n".join([
+    "\n📋 EXTRACTION OPTIONS:",
+    "=" * 30,
+    "1. 📈 Extract specific stock data",
+    "2. 📊 Extract NIFTY 50 index data",
+    "3. 🔧 Batch extraction (multiple stocks)",
+    "4. 💼 Popular stocks quick extraction",
+    "5. 🧪 Test extraction (debug mode)",
+])
+
+def _section_banner(title):
+    """Return a menu section title framed by rules, for a single print() call"""
+    rule = "=" * 50
+    return f"\n{rule}\n{title}\n{rule}"
+
+def _report_extraction(extractor, df):
+    """Print the completion summary for a single-symbol extraction"""
+    if df is not None and not df.empty:
+        print(
+            f"\n✅ DATA EXTRACTION COMPLETED SUCCESSFULLY!\n"
+            f"📊 Total records extracted: {len(df)}\n"
+            f"📄 Data saved in: {os.path.abspath(extractor.output_dir)}"
+        )
+
+def _extract_individual_stock(extractor):
+    """Menu option 1: individual stock data extraction"""
+    print(_section_banner("📈 INDIVIDUAL STOCK DATA EXTRACTION"))
+    
+    symbol = input("📝 Enter stock symbol (e.g., ADANIPORTS, RELIANCE, TCS): ").strip().upper()
+    if not symbol:
+        print("❌ Stock symbol cannot be empty!")
+        return
+    
+    # Get time frame
+    days, interval, description = extractor.get_time_frame_input()
+    
+    # Confirm extraction
+    print(f"\n🔍 EXTRACTION PREVIEW:\n   🏢 Stock: {symbol}\n   ⏰ Time Frame: {description}")
+    
+    confirm = input(f"\n❓ Proceed with extraction? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("⏹️  Extraction cancelled")
+        return
+    
+    _report_extraction(extractor, extractor.extract_stock_data(symbol, days=days, interval=interval))
+
+def _extract_nifty50(extractor):
+    """Menu option 2: NIFTY 50 index data extraction"""
+    print(_section_banner("📊 NIFTY 50 INDEX DATA EXTRACTION"))
+    
+    # Get time frame
+    days, interval, description = extractor.get_time_frame_input()
+    
+    # Confirm extraction
+    print(f"\n🔍 EXTRACTION PREVIEW:\n   📊 Index: NIFTY 50\n   ⏰ Time Frame: {description}")
+    
+    confirm = input(f"\n❓ Proceed with extraction? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("⏹️  Extraction cancelled")
+        return
+    
+    _report_extraction(extractor, extractor.extract_nifty50_data(days=days, interval=interval))
+
+def _extract_batch(extractor):
+    """Menu option 3: batch extraction of multiple stocks"""
+    print(_section_banner("🔧 BATCH EXTRACTION (MULTIPLE STOCKS)"))
+    
+    symbols_input = input("📝 Enter stock symbols separated by commas (e.g., ADANIPORTS,RELIANCE,TCS): ").strip().upper()
+    if not symbols_input:
+        print("❌ No symbols provided!")
+        return
+    
+    symbols = [s.strip() for s in symbols_input.split(',')]
+    print(f"📋 Stocks to extract: {symbols}")
+    
+    # Get time frame
+    days, interval, description = extractor.get_time_frame_input()
+    
+    # Confirm extraction
+    print(
+        f"\n🔍 BATCH EXTRACTION PREVIEW:\n"
+        f"   🏢 Stocks: {len(symbols)} stocks ({', '.join(symbols)})\n"
+        f"   ⏰ Time Frame: {description}"
+    )
+    
+    confirm = input(f"\n❓ Proceed with batch extraction? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("⏹️  Extraction cancelled")
+        return
+    
+    # Each worker's prints are captured and shown as one block when it finishes
+    stdout = _ThreadBufferedStdout(sys.stdout)
+    
+    def extract(symbol):
+        stdout.start_capture()
+        try:
+            # The symbols already run concurrently, so each fetches its own chunks in order
+            return extractor.extract_stock_data(symbol, days=days, interval=interval, chunk_workers=1), stdout.end_capture()
+        except Exception as e:
+            return e, stdout.end_capture()
+    
+    # Extract stocks concurrently; historical_data calls are paced by the shared rate limiter
+    with redirect_stdout(stdout), ThreadPoolExecutor(max_workers=min(len(symbols), BATCH_MAX_WORKERS)) as executor:
+        futures = {executor.submit(extract, symbol): symbol for symbol in symbols}
+        for i, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            df, output = future.result()
+            print(f"\n🔄 Finished {i}/{len(symbols)}: {symbol}")
+            print(output, end='')
+            if isinstance(df, Exception):
+                print(f"❌ Error extracting {symbol}: {df}")
+            elif df.empty:
+                print(f"⚠️  Failed to extract data for {symbol}")
+    
+    print(f"\n✅ BATCH EXTRACTION COMPLETED!")
+    print(f"🎉 All extractions completed! Check individual files in: {os.path.abspath(extractor.output_dir)}")
+
+def _extract_popular_stock(extractor):
+    """Menu option 4: popular stocks quick extraction"""
+    print(_section_banner("💼 POPULAR STOCKS QUICK EXTRACTION"))
+    
+    print("📋 Popular Stocks:\n" + "\n".join(
+        f"  {key}. {stock['symbol']:<12} - {stock['name']}" for key, stock in POPULAR_STOCKS.items()
+    ))
+    
+    stock_choice = input("\n📈 Select a stock (1-8): ").strip()
+    if stock_choice not in POPULAR_STOCKS:
+        print("❌ Invalid choice!")
+        return
+    
+    selected_stock = POPULAR_STOCKS[stock_choice]
+    symbol = selected_stock['symbol']
+    
+    # Get time frame
+    days, interval, description = extractor.get_time_frame_input()
+    
+    # Confirm extraction
+    print(
+        f"\n🔍 EXTRACTION PREVIEW:\n"
+        f"   🏢 Stock: {symbol} ({selected_stock['name']})\n"
+        f"   ⏰ Time Frame: {description}"
+    )
+    
+    confirm = input(f"\n❓ Proceed with extraction? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("⏹️  Extraction cancelled")
+        return
+    
+    _report_extraction(extractor, extractor.extract_stock_data(symbol, days=days, interval=interval))
+
+def _run_debug_test(extractor):
+    """Menu option 5: debug test extraction"""
+    print(_section_banner("🧪 DEBUG TEST EXTRACTION"))
+    print("This will test basic data extraction to help debug issues")
+    
+    confirm = input("❓ Run debug test? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("⏹️  Test cancelled")
+        return
+    
+    extractor.test_simple_extraction()
+    print(f"🧪 Debug test completed! Check the output above for details.")
+
+# Menu choice -> handler, looked up once instead of walking an if/elif chain
+EXTRACTION_ACTIONS = {
+    "1": _extract_individual_stock,
+    "2": _extract_nifty50,
+    "3": _extract_batch,
+    "4": _extract_popular_stock,
+    "5": _run_debug_test,
+}
+
 def main():
     """
     Main function - Entry point of the application
@@ -847,178 +1416,30 @@ def main():
     Market Hours: 9:15 AM to 3:30 PM IST
     All times are handled in IST (Indian Standard Time)
     """
-    print("🚀 KITE DATA EXTRACTOR")
-    print("=" * 50)
-    print("📍 Market Hours: 9:15 AM to 3:30 PM IST")
-    print("⏰ Current Time:", datetime.now().strftime('%Y-%m-%d %H:%M:%S IST'))
+    print(
+        "🚀 KITE DATA EXTRACTOR\n"
+        f"{'=' * 50}\n"
+        "📍 Market Hours: 9:15 AM to 3:30 PM IST\n"
+        f"⏰ Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S IST')}"
+    )
     
     try:
         # Initialize extractor
         extractor = DataExtractor()
         
-        print("\n📋 EXTRACTION OPTIONS:")
-        print("=" * 30)
-        print("1. 📈 Extract specific stock data")
-        print("2. 📊 Extract NIFTY 50 index data")
-        print("3. 🔧 Batch extraction (multiple stocks)")
-        print("4. 💼 Popular stocks quick extraction")
-        print("5. 🧪 Test extraction (debug mode)")
+        # Fetch the NSE instruments (popular stocks, symbol search) while the user picks from the menus
+        extractor.preload_instruments("NSE")
+        
+        print(EXTRACTION_MENU)
         
         choice = input("\nEnter your choice (1-5): ").strip()
         
-        if choice == "1":
-            # Individual stock data extraction
-            print("\n" + "="*50)
-            print("📈 INDIVIDUAL STOCK DATA EXTRACTION")
-            print("="*50)
-            
-            symbol = input("📝 Enter stock symbol (e.g., ADANIPORTS, RELIANCE, TCS): ").strip().upper()
-            if not symbol:
-                print("❌ Stock symbol cannot be empty!")
-                return
-            
-            # Get time frame
-            days, interval, description = extractor.get_time_frame_input()
-            
-            # Confirm extraction
-            print(f"\n🔍 EXTRACTION PREVIEW:")
-            print(f"   🏢 Stock: {symbol}")
-            print(f"   ⏰ Time Frame: {description}")
-            
-            confirm = input(f"\n❓ Proceed with extraction? (y/n): ").strip().lower()
-            if confirm != 'y':
-                print("⏹️  Extraction cancelled")
-                return
-            
-            df = extractor.extract_stock_data(symbol, days=days, interval=interval)
-            
-        elif choice == "2":
-            # NIFTY 50 data extraction
-            print("\n" + "="*50)
-            print("📊 NIFTY 50 INDEX DATA EXTRACTION")
-            print("="*50)
-            
-            # Get time frame
-            days, interval, description = extractor.get_time_frame_input()
-            
-            # Confirm extraction
-            print(f"\n🔍 EXTRACTION PREVIEW:")
-            print(f"   📊 Index: NIFTY 50")
-            print(f"   ⏰ Time Frame: {description}")
-            
-            confirm = input(f"\n❓ Proceed with extraction? (y/n): ").strip().lower()
-            if confirm != 'y':
-                print("⏹️  Extraction cancelled")
-                return
-            
-            df = extractor.extract_nifty50_data(days=days, interval=interval)
-            
-        elif choice == "3":
-            # Batch extraction
-            print("\n" + "="*50)
-            print("🔧 BATCH EXTRACTION (MULTIPLE STOCKS)")
-            print("="*50)
-            
-            symbols_input = input("📝 Enter stock symbols separated by commas (e.g., ADANIPORTS,RELIANCE,TCS): ").strip().upper()
-            if not symbols_input:
-                print("❌ No symbols provided!")
-                return
-            
-            symbols = [s.strip() for s in symbols_input.split(',')]
-            print(f"📋 Stocks to extract: {symbols}")
-            
-            # Get time frame
-            days, interval, description = extractor.get_time_frame_input()
-            
-            # Confirm extraction
-            print(f"\n🔍 BATCH EXTRACTION PREVIEW:")
-            print(f"   🏢 Stocks: {len(symbols)} stocks ({', '.join(symbols)})")
-            print(f"   ⏰ Time Frame: {description}")
-            
-            confirm = input(f"\n❓ Proceed with batch extraction? (y/n): ").strip().lower()
-            if confirm != 'y':
-                print("⏹️  Extraction cancelled")
-                return
-            
-            # Extract data for each stock
-            for i, symbol in enumerate(symbols, 1):
-                print(f"\n🔄 Extracting {i}/{len(symbols)}: {symbol}")
-                df = extractor.extract_stock_data(symbol, days=days, interval=interval)
-                if df.empty:
-                    print(f"⚠️  Failed to extract data for {symbol}")
-            
-            print(f"\n✅ BATCH EXTRACTION COMPLETED!")
-            
-        elif choice == "4":
-            # Popular stocks quick extraction
-            print("\n" + "="*50)
-            print("💼 POPULAR STOCKS QUICK EXTRACTION")
-            print("="*50)
-            
-            popular_stocks = {
-                "1": {"symbol": "RELIANCE", "name": "Reliance Industries"},
-                "2": {"symbol": "TCS", "name": "Tata Consultancy Services"},
-                "3": {"symbol": "HDFCBANK", "name": "HDFC Bank"},
-                "4": {"symbol": "INFY", "name": "Infosys"},
-                "5": {"symbol": "ADANIPORTS", "name": "Adani Ports"},
-                "6": {"symbol": "SBIN", "name": "State Bank of India"},
-                "7": {"symbol": "ITC", "name": "ITC Limited"},
-                "8": {"symbol": "LT", "name": "Larsen & Toubro"}
-            }
-            
-            print("📋 Popular Stocks:")
-            for key, stock in popular_stocks.items():
-                print(f"  {key}. {stock['symbol']:<12} - {stock['name']}")
-            
-            stock_choice = input("\n📈 Select a stock (1-8): ").strip()
-            if stock_choice not in popular_stocks:
-                print("❌ Invalid choice!")
-                return
-            
-            selected_stock = popular_stocks[stock_choice]
-            symbol = selected_stock['symbol']
-            
-            # Get time frame
-            days, interval, description = extractor.get_time_frame_input()
-            
-            # Confirm extraction
-            print(f"\n🔍 EXTRACTION PREVIEW:")
-            print(f"   🏢 Stock: {symbol} ({selected_stock['name']})")
-            print(f"   ⏰ Time Frame: {description}")
-            
-            confirm = input(f"\n❓ Proceed with extraction? (y/n): ").strip().lower()
-            if confirm != 'y':
-                print("⏹️  Extraction cancelled")
-                return
-            
-            df = extractor.extract_stock_data(symbol, days=days, interval=interval)
-            
-        elif choice == "5":
-            # Test extraction
-            print("\n" + "="*50)
-            print("🧪 DEBUG TEST EXTRACTION")
-            print("="*50)
-            print("This will test basic data extraction to help debug issues")
-            
-            confirm = input("❓ Run debug test? (y/n): ").strip().lower()
-            if confirm == 'y':
-                extractor.test_simple_extraction()
-            else:
-                print("⏹️  Test cancelled")
-                return
-            
-        else:
+        action = EXTRACTION_ACTIONS.get(choice)
+        if action is None:
             print("❌ Invalid choice! Please select 1-5")
             return
         
-        if choice in ["1", "2", "4"] and 'df' in locals() and not df.empty:
-            print(f"\n✅ DATA EXTRACTION COMPLETED SUCCESSFULLY!")
-            print(f"📊 Total records extracted: {len(df)}")
-            print(f"📄 Data saved to CSV file in: {os.path.abspath(extractor.output_dir)}")
-        elif choice == "3":
-            print(f"🎉 All extractions completed! Check individual CSV files in: {os.path.abspath(extractor.output_dir)}")
-        elif choice == "5":
-            print(f"🧪 Debug test completed! Check the output above for details.")
+        action(extractor)
     
     except KeyboardInterrupt:
         print(f"\n\n⏹️  Process interrupted by user")
@@ -6,6 +6,7 @@ Update these values with your actual database credentials
 """
 
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
 load_dotenv()
 
@@ -38,6 +39,10 @@ TABLE_NAME_MAPPING = {
     "day": "day"
 }
 
+# Characters dropped from symbols when building table names
+_SYMBOL_STRIP = str.maketrans('', '', ' -&')
+
+@lru_cache(maxsize=1024)
 def get_table_name(symbol, interval):
     """
     Generate table name based on symbol and interval
@@ -50,7 +55,7 @@ def get_table_name(symbol, interval):
         str: Table name (e.g., "nifty_5m", "reliance_day", "indiavix_5m")
     """
     # Clean symbol name
-    clean_symbol = symbol.replace(" ", "").replace("-", "").replace("&", "").lower()
+    clean_symbol = symbol.translate(_SYMBOL_STRIP).lower()
     
     # Special handling for indices and special symbols
     if "nifty50" in clean_symbol or "nifty" in clean_symbol:
@@ -85,6 +90,7 @@ CREATE TABLE IF NOT EXISTS {table_name} (
     year             INTEGER
 );
 
--- Create index on date for faster queries
-CREATE INDEX IF NOT EXISTS idx_{table_name}_date ON {table_name}(date);
+-- The primary key already indexes date; drop the duplicate btree older
+-- versions created, which doubled the index work of every insert
+DROP INDEX IF EXISTS idx_{table_name}_date;
 """
\ No newline at end of file
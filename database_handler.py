@@ -6,16 +6,26 @@ Requirements:
 pip install psycopg2-binary pandas
 """
 
+import io
+import threading
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
 import logging
 
+# pyarrow is optional; when installed it formats the COPY payload in C++
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
 # Import database configuration
 try:
-    from database_config import DB_CONFIG, TABLE_SCHEMA, get_table_name
+    from database_config import DB_CONFIG, POOL_CONFIG, TABLE_SCHEMA, get_table_name
 except ImportError:
     print("❌ Error: database_config.py not found!")
     raise
@@ -24,6 +34,61 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared connection pool, created on first use so importing this module never
+# needs a reachable database
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """Get the module-level connection pool, creating it on first call"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # The schema is set as a libpq startup option, so new connections
+                # need no separate SET search_path round-trip
+                options = None
+                if DB_CONFIG.get('schema') and DB_CONFIG['schema'] != 'public':
+                    options = f"-c search_path={DB_CONFIG['schema']}"
+                
+                _pool = ThreadedConnectionPool(
+                    POOL_CONFIG['minconn'],
+                    POOL_CONFIG['maxconn'],
+                    host=DB_CONFIG['host'],
+                    port=DB_CONFIG['port'],
+                    database=DB_CONFIG['database'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'],
+                    options=options
+                )
+    return _pool
+
+# Columns loaded by insert_data, in table order
+COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume',
+           'price_change', 'price_change_pct', 'high_low_range',
+           'range_pct', 'day_of_week', 'month', 'year')
+
+@lru_cache(maxsize=256)
+def _load_queries(table_name):
+    """Compose the COPY/INSERT statements used to load a table (built once per table)"""
+    table = sql.Identifier(table_name)
+    staging_table = sql.Identifier(f"{table_name}_staging")
+    column_list = sql.SQL(', ').join(map(sql.Identifier, COLUMNS))
+    copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)")
+    
+    return {
+        'create_staging': sql.SQL(
+            "CREATE TEMP TABLE IF NOT EXISTS {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+        ).format(staging_table, table),
+        'copy_staging': copy_query.format(staging_table, column_list),
+        'copy_table': copy_query.format(table, column_list),
+        'insert_from_staging': sql.SQL("""
+            INSERT INTO {} ({})
+            SELECT {} FROM {}
+            ON CONFLICT (date) DO NOTHING
+        """).format(table, column_list, column_list, staging_table),
+    }
+
 class DatabaseHandler:
     """
     Handles PostgreSQL database operations for stock data
@@ -36,34 +101,25 @@ class DatabaseHandler:
         self.connect()
     
     def connect(self):
-        """Establish database connection"""
+        """Check a connection out of the shared pool"""
         try:
-            self.connection = psycopg2.connect(
-                host=DB_CONFIG['host'],
-                port=DB_CONFIG['port'],
-                database=DB_CONFIG['database'],
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password']
-            )
+            self.connection = _get_pool().getconn()
             self.cursor = self.connection.cursor()
             logger.info("✅ Database connection established")
-            
-            # Set schema if specified
-            if DB_CONFIG.get('schema') and DB_CONFIG['schema'] != 'public':
-                self.cursor.execute(f"SET search_path TO {DB_CONFIG['schema']}")
-                self.connection.commit()
-                
         except Exception as e:
             logger.error(f"❌ Database connection failed: {e}")
             raise
     
     def disconnect(self):
-        """Close database connection"""
+        """Return the connection to the shared pool"""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.connection:
-            self.connection.close()
-        logger.info("🔌 Database connection closed")
+            # Broken connections are discarded rather than handed out again
+            _get_pool().putconn(self.connection, close=bool(self.connection.closed))
+            self.connection = None
+        logger.info("🔌 Database connection released")
     
     def create_table_if_not_exists(self, table_name):
         """Create table if it doesn't exist"""
@@ -75,17 +131,34 @@ class DatabaseHandler:
             self.cursor.execute(create_query)
             self.connection.commit()
             
-            logger.info(f"✅ Table '{table_name}' ready")
+            logger.info("✅ Table '%s' ready", table_name)
             
         except Exception as e:
             logger.error(f"❌ Error creating table: {e}")
             self.connection.rollback()
             raise
     
+    def get_latest_date(self, table_name):
+        """Get the most recent date in the table (None if empty or missing)"""
+        try:
+            # Answered from the end of the primary key index, without reading the table
+            query = sql.SQL("SELECT MAX(date) FROM {}").format(sql.Identifier(table_name))
+            self.cursor.execute(query)
+            return self.cursor.fetchone()[0]
+        except psycopg2.errors.UndefinedTable:
+            # Table doesn't exist yet
+            self.connection.rollback()
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error fetching latest date: {e}")
+            self.connection.rollback()
+            return None
+    
     def get_existing_dates(self, table_name):
         """Get list of dates already in the table"""
         try:
-            query = sql.SQL("SELECT DISTINCT date FROM {} ORDER BY date").format(
+            # date is the primary key, so the values are already distinct
+            query = sql.SQL("SELECT date FROM {} ORDER BY date").format(
                 sql.Identifier(table_name)
             )
             self.cursor.execute(query)
@@ -98,7 +171,106 @@ class DatabaseHandler:
             logger.error(f"❌ Error fetching existing dates: {e}")
             return []
     
-    def insert_data(self, df, symbol, interval, mode='append'):
+    def _copy_buffer(self, df):
+        """Serialize the table columns of df as a CSV buffer for COPY"""
+        if pa is not None:
+            buffer = io.BytesIO()
+            pacsv.write_csv(
+                pa.Table.from_pandas(df, columns=list(COLUMNS), preserve_index=False),
+                buffer,
+                write_options=pacsv.WriteOptions(include_header=False, batch_size=65536)
+            )
+        else:
+            buffer = io.StringIO()
+            df[list(COLUMNS)].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        return buffer
+    
+    def copy_rows(self, table_name, df):
+        """
+        Bulk-load rows with COPY through a temporary staging table
+        
+        COPY itself cannot skip conflicting rows, so the rows are copied into a
+        temp table (dropped on commit) and moved across with a single
+        INSERT ... SELECT ... ON CONFLICT (date) DO NOTHING.
+        
+        Args:
+            table_name (str): Target table
+            df (pd.DataFrame): Rows to load
+        
+        Returns:
+            int: Number of rows inserted into the target table
+        """
+        queries = _load_queries(table_name)
+        self.cursor.execute(queries['create_staging'])
+        self.cursor.copy_expert(queries['copy_staging'].as_string(self.connection), self._copy_buffer(df))
+        self.cursor.execute(queries['insert_from_staging'])
+        return self.cursor.rowcount
+    
+    def is_table_empty(self, table_name):
+        """Check whether a table has no rows"""
+        self.cursor.execute(sql.SQL("SELECT NOT EXISTS (SELECT 1 FROM {})").format(
+            sql.Identifier(table_name)
+        ))
+        return self.cursor.fetchone()[0]
+    
+    def get_primary_key(self, table_name):
+        """
+        Look up a table's primary key constraint
+        
+        Returns:
+            tuple: (constraint_name, definition) e.g. ('t_pkey', 'PRIMARY KEY (date)'), or None
+        """
+        self.cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = quote_ident(%s)::regclass AND contype = 'p'
+            """,
+            (table_name,)
+        )
+        return self.cursor.fetchone()
+    
+    def bulk_load_rows(self, table_name, df):
+        """
+        Initial fill of an empty table without WAL or per-row index maintenance
+        
+        The table is switched to UNLOGGED and its primary key dropped, the rows
+        are copied straight in, then the key is rebuilt in one sorted pass and
+        the table switched back to LOGGED. All of it runs in the caller's
+        transaction, so a failure rolls the table back to its original state.
+        
+        Args:
+            table_name (str): Target table (must be empty)
+            df (pd.DataFrame): Rows to load
+        
+        Returns:
+            int: Number of rows loaded (duplicate dates dropped beforehand are
+            not counted, so the caller reports them as skipped)
+        """
+        table = sql.Identifier(table_name)
+        
+        # The key is rebuilt under its real name and definition, whatever created the table
+        primary_key = self.get_primary_key(table_name)
+        
+        # No ON CONFLICT without the key, so drop duplicate dates up front
+        df = df.drop_duplicates(subset='date')
+        
+        self.cursor.execute(sql.SQL("ALTER TABLE {} SET UNLOGGED").format(table))
+        if primary_key:
+            self.cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(table, sql.Identifier(primary_key[0])))
+        
+        self.cursor.copy_expert(_load_queries(table_name)['copy_table'].as_string(self.connection), self._copy_buffer(df))
+        
+        if primary_key:
+            # The definition comes from pg_get_constraintdef, so it is already valid SQL
+            self.cursor.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                table, sql.Identifier(primary_key[0]), sql.SQL(primary_key[1])
+            ))
+        self.cursor.execute(sql.SQL("ALTER TABLE {} SET LOGGED").format(table))
+        return len(df)
+    
+    def insert_data(self, df, symbol, interval, mode='append', bulk_load=False):
         """
         Insert DataFrame data into database
         
@@ -107,6 +279,7 @@ class DatabaseHandler:
             symbol (str): Stock/Index symbol
             interval (str): Time interval
             mode (str): 'append' (skip duplicates) or 'replace' (overwrite)
+            bulk_load (bool): Use the UNLOGGED/deferred-key path when the table is empty
         
         Returns:
             tuple: (success, records_inserted, message)
@@ -114,38 +287,22 @@ class DatabaseHandler:
         try:
             # Generate table name
             table_name = get_table_name(symbol, interval)
-            logger.info(f"📊 Processing data for table: {table_name}")
+            logger.info("📊 Processing data for table: %s", table_name)
             
             # Create table if it doesn't exist
             self.create_table_if_not_exists(table_name)
             
-            # Prepare DataFrame
-            df_copy = df.copy()
-            
-            # Ensure date column is properly formatted
-            df_copy['date'] = pd.to_datetime(df_copy['date'])
-            
-            if mode == 'append':
-                # Get existing dates to avoid duplicates
-                existing_dates = self.get_existing_dates(table_name)
-                
-                if existing_dates:
-                    # Convert to pandas datetime for comparison
-                    existing_dates_pd = pd.to_datetime(existing_dates)
-                    
-                    # Filter out rows that already exist
-                    initial_count = len(df_copy)
-                    df_copy = df_copy[~df_copy['date'].isin(existing_dates_pd)]
-                    
-                    skipped_count = initial_count - len(df_copy)
-                    if skipped_count > 0:
-                        logger.info(f"⏭️  Skipping {skipped_count} duplicate records")
+            # Ensure date column is properly formatted (copies only when a conversion is needed)
+            if not pd.api.types.is_datetime64_any_dtype(df['date']):
+                df = df.assign(date=pd.to_datetime(df['date']))
             
-            elif mode == 'replace':
+            # In 'append' mode duplicates are skipped by ON CONFLICT (date) DO NOTHING
+            # in copy_rows, using the primary key index instead of pulling every stored date
+            if mode == 'replace':
                 # Delete existing data for the date range
-                if len(df_copy) > 0:
-                    min_date = df_copy['date'].min()
-                    max_date = df_copy['date'].max()
+                if len(df) > 0:
+                    min_date = df['date'].min()
+                    max_date = df['date'].max()
                     
                     delete_query = sql.SQL(
                         "DELETE FROM {} WHERE date >= %s AND date <= %s"
@@ -154,41 +311,35 @@ class DatabaseHandler:
                     self.cursor.execute(delete_query, (min_date, max_date))
                     deleted_count = self.cursor.rowcount
                     if deleted_count > 0:
-                        logger.info(f"🗑️  Deleted {deleted_count} existing records")
+                        logger.info("🗑️  Deleted %d existing records", deleted_count)
             
             # Insert data if there are new records
-            if len(df_copy) > 0:
-                # Prepare data for insertion
-                columns = ['date', 'open', 'high', 'low', 'close', 'volume', 
-                          'price_change', 'price_change_pct', 'high_low_range', 
-                          'range_pct', 'day_of_week', 'month', 'year']
-                
-                # Convert DataFrame to list of tuples
-                data = df_copy[columns].values.tolist()
-                
-                # Prepare INSERT query
-                insert_query = sql.SQL("""
-                    INSERT INTO {} ({}) 
-                    VALUES %s
-                    ON CONFLICT (date) DO NOTHING
-                """).format(
-                    sql.Identifier(table_name),
-                    sql.SQL(', ').join(map(sql.Identifier, columns))
-                )
-                
-                # Execute bulk insert
-                execute_values(self.cursor, insert_query, data)
+            if len(df) > 0:
+                # Bulk load with COPY (no per-row INSERT parsing)
+                if bulk_load and self.is_table_empty(table_name):
+                    logger.info("🚚 Bulk loading empty table %s", table_name)
+                    records_inserted = self.bulk_load_rows(table_name, df)
+                else:
+                    records_inserted = self.copy_rows(table_name, df)
                 
                 # Commit transaction
                 self.connection.commit()
                 
-                records_inserted = self.cursor.rowcount
-                logger.info(f"✅ Inserted {records_inserted} new records into {table_name}")
+                # Rows ON CONFLICT skipped, or duplicate dates bulk_load_rows dropped
+                skipped_count = len(df) - records_inserted
+                if skipped_count > 0:
+                    logger.info("⏭️  Skipped %d duplicate records", skipped_count)
+                
+                if records_inserted == 0:
+                    logger.info("ℹ️  No new records to insert (all data already exists)")
+                    return True, 0, "No new records to insert (all data already exists)"
+                
+                logger.info("✅ Inserted %d new records into %s", records_inserted, table_name)
                 
                 return True, records_inserted, f"Successfully inserted {records_inserted} records"
             else:
-                logger.info("ℹ️  No new records to insert (all data already exists)")
-                return True, 0, "No new records to insert (all data already exists)"
+                logger.info("ℹ️  No records to insert")
+                return True, 0, "No records to insert (empty data)"
             
         except Exception as e:
             logger.error(f"❌ Error inserting data: {e}")
@@ -245,7 +396,7 @@ class DatabaseHandler:
             logger.error(f"Connection test failed: {e}")
             return False
 
-def push_data_to_db(df, symbol, interval, mode='append'):
+def push_data_to_db(df, symbol, interval, mode='append', bulk_load=False):
     """
     Convenience function to push data to database
     
@@ -254,27 +405,24 @@ def push_data_to_db(df, symbol, interval, mode='append'):
         symbol (str): Stock/Index symbol
         interval (str): Time interval
         mode (str): 'append' or 'replace'
+        bulk_load (bool): Fast initial load when the table is empty
     
     Returns:
         tuple: (success, records_inserted, message)
     """
     db_handler = None
     try:
-        # Create database handler
+        # Check out a pooled connection (no separate SELECT 1 round-trip)
         db_handler = DatabaseHandler()
         
-        # Test connection
-        if not db_handler.test_connection():
-            return False, 0, "Database connection test failed"
-        
         # Insert data
-        return db_handler.insert_data(df, symbol, interval, mode)
+        return db_handler.insert_data(df, symbol, interval, mode, bulk_load)
         
     except Exception as e:
         return False, 0, f"Database error: {str(e)}"
         
     finally:
-        # Always close connection
+        # Always return the connection to the pool
         if db_handler:
             db_handler.disconnect()
 
@@ -13,8 +13,44 @@ import time
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from dotenv import load_dotenv
 
+# orjson is optional; when installed it (de)serializes the token file in C
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
+# Seconds a freshly validated token (in this process or just saved to disk) is reused without another check
+TOKEN_CACHE_TTL = 300
+
+# Token validated in this process, shared by repeated get_kite_token() calls
+_TOKEN_CACHE = {'token': None, 'validated_at': 0.0}
+
+# Redirect pages served by the local auth server (encoded once)
+_SUCCESS_HTML = """
+<html>
+    <head><title>Kite Authentication</title></head>
+    <body style="font-family: Arial; text-align: center; margin-top: 100px; background-color: #f0f8ff;">
+        <h2 style="color: green;">✅ Authentication Successful!</h2>
+        <p style="font-size: 18px;">Token received successfully.</p>
+        <p>You can close this browser window now.</p>
+        <p style="color: #666;">Return to your Python application.</p>
+    </body>
+</html>
+""".encode()
+
+_ERROR_HTML = """
+<html>
+    <head><title>Kite Authentication Error</title></head>
+    <body style="font-family: Arial; text-align: center; margin-top: 100px; background-color: #ffe4e1;">
+        <h2 style="color: red;">❌ Authentication Failed</h2>
+        <p>Request token not found in URL.</p>
+        <p>Please try again.</p>
+    </body>
+</html>
+""".encode()
+
 class KiteAuthenticator:
     """
     Kite API Authentication Handler
@@ -28,7 +64,10 @@ class KiteAuthenticator:
         self.kite = KiteConnect(api_key=self.api_key)
         self.access_token = None
         self.credentials_file = "kite_token.json"
+        self._token_data = None
+        self.validated_at = None  # When the current access_token was last confirmed valid
         self.request_token = None
+        self.token_event = threading.Event()
         self.server_port = 8000
     
     def save_token(self, access_token):
@@ -38,19 +77,22 @@ class KiteAuthenticator:
             'api_key': self.api_key,
             'timestamp': time.time()
         }
-        with open(self.credentials_file, 'w') as f:
-            json.dump(token_data, f)
+        with open(self.credentials_file, 'wb') as f:
+            f.write(orjson.dumps(token_data) if orjson else json.dumps(token_data).encode())
+        self._token_data = token_data
         print(f"💾 Token saved to {self.credentials_file}")
     
     def load_token(self):
-        """Load saved access token"""
-        if os.path.exists(self.credentials_file):
+        """Load saved access token (the file is parsed once per instance)"""
+        if self._token_data is None and os.path.exists(self.credentials_file):
             try:
-                with open(self.credentials_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('access_token')
+                with open(self.credentials_file, 'rb') as f:
+                    raw = f.read()
+                self._token_data = orjson.loads(raw) if orjson else json.loads(raw)
             except:
                 return None
+        if self._token_data:
+            return self._token_data.get('access_token')
         return None
     
     def test_token(self, access_token):
@@ -68,47 +110,29 @@ class KiteAuthenticator:
         auth_instance = self
         
         class RedirectHandler(BaseHTTPRequestHandler):
+            # Drop idle connections (e.g. browser preconnects) so they can't stall the serve loop
+            timeout = 5
+            
             def do_GET(self):
                 parsed_path = urllib.parse.urlparse(self.path)
                 query_params = urllib.parse.parse_qs(parsed_path.query)
                 
                 if 'request_token' in query_params:
                     auth_instance.request_token = query_params['request_token'][0]
+                    auth_instance.token_event.set()
                     
                     # Send success response
-                    self.send_response(200)
-                    self.send_header('Content-type', 'text/html')
-                    self.end_headers()
-                    
-                    success_html = """
-                    <html>
-                        <head><title>Kite Authentication</title></head>
-                        <body style="font-family: Arial; text-align: center; margin-top: 100px; background-color: #f0f8ff;">
-                            <h2 style="color: green;">✅ Authentication Successful!</h2>
-                            <p style="font-size: 18px;">Token received successfully.</p>
-                            <p>You can close this browser window now.</p>
-                            <p style="color: #666;">Return to your Python application.</p>
-                        </body>
-                    </html>
-                    """
-                    self.wfile.write(success_html.encode())
+                    self._send_html(200, _SUCCESS_HTML)
                 else:
                     # Send error response
-                    self.send_response(400)
-                    self.send_header('Content-type', 'text/html')
-                    self.end_headers()
-                    
-                    error_html = """
-                    <html>
-                        <head><title>Kite Authentication Error</title></head>
-                        <body style="font-family: Arial; text-align: center; margin-top: 100px; background-color: #ffe4e1;">
-                            <h2 style="color: red;">❌ Authentication Failed</h2>
-                            <p>Request token not found in URL.</p>
-                            <p>Please try again.</p>
-                        </body>
-                    </html>
-                    """
-                    self.wfile.write(error_html.encode())
+                    self._send_html(400, _ERROR_HTML)
+            
+            def _send_html(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
             
             def log_message(self, format, *args):
                 # Suppress server logs
@@ -120,12 +144,9 @@ class KiteAuthenticator:
         """Automated authentication using local server"""
         print("🔐 Starting automated authentication...")
         
-        # Start local server
+        # Bind the local redirect server (HTTPServer already reuses the port, so a quick re-run doesn't hit TIME_WAIT)
         handler = self.create_redirect_handler()
         server = HTTPServer(('localhost', self.server_port), handler)
-        server_thread = threading.Thread(target=server.serve_forever)
-        server_thread.daemon = True
-        server_thread.start()
         print("🖥️  Local server started on port 8000")
         
         # Open browser for login
@@ -136,19 +157,21 @@ class KiteAuthenticator:
         print("📱 Please complete login in the browser...")
         print("⏳ Waiting for authentication (timeout: 120 seconds)...")
         
-        # Wait for request token
-        timeout = 120
-        start_time = time.time()
-        
-        while self.request_token is None:
-            if time.time() - start_time > timeout:
-                print("⏰ Authentication timeout!")
-                server.shutdown()
-                return None
-            time.sleep(1)
+        # Serve requests on this thread until the redirect sets the event or time runs out
+        deadline = time.monotonic() + 120
+        try:
+            while not self.token_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                server.timeout = remaining
+                server.handle_request()
+        finally:
+            server.server_close()
         
-        # Stop server
-        server.shutdown()
+        if not self.token_event.is_set():
+            print("⏰ Authentication timeout!")
+            return None
         
         try:
             print(f"✅ Request token received: {self.request_token[:10]}...")
@@ -161,6 +184,7 @@ class KiteAuthenticator:
             is_valid, result = self.test_token(access_token)
             if is_valid:
                 self.access_token = access_token
+                self.validated_at = time.time()
                 self.save_token(access_token)
                 print(f"🎉 Authentication successful!")
                 print(f"👤 User: {result.get('user_name', 'Unknown')}")
@@ -190,12 +214,20 @@ class KiteAuthenticator:
             # Try to load saved token first
             saved_token = self.load_token()
             if saved_token:
+                # A token saved moments ago was validated at login; skip the profile() round-trip
+                if time.time() - self._token_data.get('timestamp', 0) < TOKEN_CACHE_TTL:
+                    print("✅ Saved token was validated moments ago, reusing it")
+                    self.access_token = saved_token
+                    self.validated_at = self._token_data.get('timestamp', 0)
+                    return saved_token
+
                 print("🔍 Found saved token, testing...")
                 is_valid, result = self.test_token(saved_token)
                 if is_valid:
                     print(f"✅ Saved token is valid!")
                     print(f"👤 User: {result.get('user_name', 'Unknown')}")
                     self.access_token = saved_token
+                    self.validated_at = time.time()
                     return saved_token
                 else:
                     print(f"❌ Saved token expired: {result}")
@@ -215,8 +247,17 @@ def get_kite_token(force_new=False):
     Returns:
         str: Access token or None
     """
+    # Reuse a token this process validated recently (no file read or profile() call)
+    if not force_new and _TOKEN_CACHE['token'] and time.time() - _TOKEN_CACHE['validated_at'] < TOKEN_CACHE_TTL:
+        return _TOKEN_CACHE['token']
+    
     authenticator = KiteAuthenticator()
-    return authenticator.get_access_token(force_new=force_new)
+    token = authenticator.get_access_token(force_new=force_new)
+    if token:
+        # A token reused from the file without a profile() call keeps its saved timestamp
+        _TOKEN_CACHE['token'] = token
+        _TOKEN_CACHE['validated_at'] = authenticator.validated_at
+    return token
 
 # Test if run directly
 if __name__ == "__main__":
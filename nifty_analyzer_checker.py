@@ -3,19 +3,35 @@ Configuration Checker for NIFTY First Hour Analyzer
 Validates all settings and connections before running the main analyzer
 
 Usage:
-python check_nifty_analyzer.py
+python check_nifty_analyzer.py [--no-net]
+
+Pass --no-net (or set KITE_SKIP_NET_CHECK=1) to skip the Kite token check,
+which may call the Kite API.
 """
 
 import sys
 import os
 from datetime import datetime, time
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _local_files():
+    """Names in the working directory, listed once with a single scandir"""
+    with os.scandir('.') as entries:
+        return frozenset(entry.name for entry in entries)
+
+@lru_cache(maxsize=None)
+def _find_spec(module_name):
+    """importlib.util.find_spec, memoized per module name"""
+    return importlib.util.find_spec(module_name)
 
 def check_module(module_name, file_name=None):
     """Check if a Python module exists"""
     if file_name:
         # Check for local file
-        if os.path.exists(file_name):
+        if file_name in _local_files():
             print(f"✅ {file_name} found")
             return True
         else:
@@ -23,7 +39,7 @@ def check_module(module_name, file_name=None):
             return False
     else:
         # Check for installed package
-        spec = importlib.util.find_spec(module_name)
+        spec = _find_spec(module_name)
         if spec is not None:
             print(f"✅ {module_name} is installed")
             return True
@@ -31,6 +47,30 @@ def check_module(module_name, file_name=None):
             print(f"❌ {module_name} is not installed")
             return False
 
+def _last_line(path, blocksize=4096):
+    """Return the last line of a file below its header, reading backwards from the end"""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        while pos > 0:
+            step = min(blocksize, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            body = tail.rstrip(b'\r\n')
+            if b'\n' in body:
+                return body.rsplit(b'\n', 1)[1].decode('utf-8', errors='replace')
+    return None  # header only (or empty)
+
+def _kite_token_check():
+    """Validate the saved Kite token, if any (one HTTPS call; never starts a browser login)"""
+    from kite_authenticator import KiteAuthenticator
+    authenticator = KiteAuthenticator()
+    token = authenticator.load_token()
+    if token and authenticator.test_token(token)[0]:
+        return token
+    return None
+
 def check_time_validity():
     """Check if current time is appropriate for analysis"""
     current_time = datetime.now()
@@ -64,79 +104,88 @@ def main():
     
     all_checks_passed = True
     
-    # 1. Check Python version
-    print("\n1️⃣ Checking Python version...")
-    python_version = sys.version_info
-    if python_version.major == 3 and python_version.minor >= 7:
-        print(f"✅ Python {python_version.major}.{python_version.minor}.{python_version.micro}")
-    else:
-        print(f"❌ Python {python_version.major}.{python_version.minor} (Need 3.7+)")
-        all_checks_passed = False
-    
-    # 2. Check required packages
-    print("\n2️⃣ Checking required packages...")
-    packages = [
-        ('kiteconnect', None),
-        ('pandas', None),
-        ('telegram', None),  # python-telegram-bot
-        ('schedule', None),
-        ('requests', None)
-    ]
+    skip_kite_check = os.environ.get('KITE_SKIP_NET_CHECK') == '1' or '--no-net' in sys.argv[1:]
     
-    for package, _ in packages:
-        if not check_module(package):
-            all_checks_passed = False
-    
-    # 3. Check required files
-    print("\n3️⃣ Checking required files...")
-    files = [
-        'kite_authenticator.py',
-        'telegram_config.py',
-        'nifty_first_hour_analyzer.py'
-    ]
-    
-    for file in files:
-        if not check_module(None, file):
-            all_checks_passed = False
-    
-    # 4. Check Telegram configuration
-    print("\n4️⃣ Checking Telegram configuration...")
-    try:
-        from telegram_config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+    # The Kite check can wait on the network, so start it now and overlap it with the local checks
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        kite_future = None if skip_kite_check else pool.submit(_kite_token_check)
         
-        if TELEGRAM_BOT_TOKEN == "YOUR_BOT_TOKEN_HERE":
-            print("❌ TELEGRAM_BOT_TOKEN not configured")
-            all_checks_passed = False
+        # 1. Check Python version
+        print("\n1️⃣ Checking Python version...")
+        python_version = sys.version_info
+        if python_version.major == 3 and python_version.minor >= 7:
+            print(f"✅ Python {python_version.major}.{python_version.minor}.{python_version.micro}")
         else:
-            print(f"✅ Telegram bot token configured ({TELEGRAM_BOT_TOKEN[:10]}...)")
-        
-        if TELEGRAM_CHAT_ID == "YOUR_CHAT_ID_HERE":
-            print("❌ TELEGRAM_CHAT_ID not configured")
+            print(f"❌ Python {python_version.major}.{python_version.minor} (Need 3.7+)")
             all_checks_passed = False
-        else:
-            print(f"✅ Telegram chat ID configured ({TELEGRAM_CHAT_ID})")
+        
+        # 2. Check required packages
+        print("\n2️⃣ Checking required packages...")
+        packages = [
+            ('kiteconnect', None),
+            ('pandas', None),
+            ('telegram', None),  # python-telegram-bot
+            ('schedule', None),
+            ('requests', None)
+        ]
+        
+        # Resolve the specs concurrently, then report them in order
+        list(pool.map(_find_spec, [package for package, _ in packages]))
+        for package, _ in packages:
+            if not check_module(package):
+                all_checks_passed = False
+        
+        # 3. Check required files
+        print("\n3️⃣ Checking required files...")
+        files = [
+            'kite_authenticator.py',
+            'telegram_config.py',
+            'nifty_first_hour_analyzer.py'
+        ]
+        
+        for file in files:
+            if not check_module(None, file):
+                all_checks_passed = False
+        
+        # 4. Check Telegram configuration
+        print("\n4️⃣ Checking Telegram configuration...")
+        try:
+            from telegram_config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
             
-    except ImportError as e:
-        print(f"❌ Error importing telegram_config: {e}")
-        all_checks_passed = False
-    
-    # 5. Check Kite authentication
-    print("\n5️⃣ Checking Kite authentication...")
-    try:
-        from kite_authenticator import get_kite_token
+            if TELEGRAM_BOT_TOKEN == "YOUR_BOT_TOKEN_HERE":
+                print("❌ TELEGRAM_BOT_TOKEN not configured")
+                all_checks_passed = False
+            else:
+                print(f"✅ Telegram bot token configured ({TELEGRAM_BOT_TOKEN[:10]}...)")
+            
+            if TELEGRAM_CHAT_ID == "YOUR_CHAT_ID_HERE":
+                print("❌ TELEGRAM_CHAT_ID not configured")
+                all_checks_passed = False
+            else:
+                print(f"✅ Telegram chat ID configured ({TELEGRAM_CHAT_ID})")
+                
+        except ImportError as e:
+            print(f"❌ Error importing telegram_config: {e}")
+            all_checks_passed = False
         
-        # Try to get token (don't force new)
-        token = get_kite_token(force_new=False)
-        if token:
-            print(f"✅ Kite access token available ({token[:10]}...)")
+        # 5. Check Kite authentication
+        print("\n5️⃣ Checking Kite authentication...")
+        if kite_future is None:
+            print("ℹ️  Skipping Kite token network validation (--no-net / KITE_SKIP_NET_CHECK=1)")
         else:
-            print("⚠️  No saved Kite token. Will need to authenticate on first run.")
-            
-    except ImportError as e:
-        print(f"❌ Error importing kite_authenticator: {e}")
-        all_checks_passed = False
-    except Exception as e:
-        print(f"⚠️  Kite authentication check error: {e}")
+            try:
+                # Started at the top of main(); only checks the saved token
+                token = kite_future.result()
+                if token:
+                    print(f"✅ Kite access token available ({token[:10]}...)")
+                else:
+                    print("⚠️  No valid saved Kite token. Will need to authenticate on first run.")
+                    
+            except ImportError as e:
+                print(f"❌ Error importing kite_authenticator: {e}")
+                all_checks_passed = False
+            except Exception as e:
+                print(f"⚠️  Kite authentication check error: {e}")
     
     # 6. Check time validity
     print("\n6️⃣ Checking time validity...")
@@ -144,19 +193,18 @@ def main():
     
     # 7. Check output directory
     print("\n7️⃣ Checking output files...")
-    if os.path.exists('nifty_first_hour.log'):
+    if 'nifty_first_hour.log' in _local_files():
         print("✅ Log file exists")
     else:
         print("ℹ️  Log file will be created on first run")
     
-    if os.path.exists('nifty_first_hour_signals.csv'):
+    if 'nifty_first_hour_signals.csv' in _local_files():
         print("✅ Signal history file exists")
         # Show last few signals
         try:
-            with open('nifty_first_hour_signals.csv', 'r') as f:
-                lines = f.readlines()
-                if len(lines) > 1:
-                    print(f"   Last signal: {lines[-1].strip()}")
+            last = _last_line('nifty_first_hour_signals.csv')
+            if last:
+                print(f"   Last signal: {last.strip()}")
         except:
             pass
     else:
@@ -1,25 +1,46 @@
 # NIFTY Expiry Day Marker Implementation
 # This code identifies and marks NIFTY expiry days based on NSE rules
 
+import calendar
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import lru_cache
 import numpy as np
 
+# numba is optional; when installed the expiry-marking kernel is compiled to machine code
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Expiry type codes used by the marking kernel, decoded to strings only when the frame is assembled
+EXPIRY_TYPE_NAMES = np.array([None, 'weekly', 'monthly'], dtype=object)
+
+@lru_cache(maxsize=2048)
 def get_last_thursday_of_month(year, month):
     """Get the last Thursday of a given month"""
-    # Start from the last day of the month
-    if month == 12:
-        next_month = datetime(year + 1, 1, 1)
-    else:
-        next_month = datetime(year, month + 1, 1)
-    
-    last_day = next_month - timedelta(days=1)
+    # Step back from the month's last day straight to its Thursday (weekday 3)
+    last_day = datetime(year, month, calendar.monthrange(year, month)[1])
+    return last_day - timedelta(days=(last_day.weekday() - 3) % 7)
+
+def last_thursday_of_months(months):
+    """
+    Get the last Thursday of many months at once (vectorized get_last_thursday_of_month)
     
-    # Find the last Thursday
-    while last_day.weekday() != 3:  # Thursday is 3
-        last_day -= timedelta(days=1)
+    Parameters:
+    months: array of datetime64[M] months, or a monthly PeriodIndex
     
-    return last_day
+    Returns:
+    datetime64[D] array with the last Thursday of each month
+    """
+    if isinstance(months, pd.PeriodIndex):
+        months = months.to_timestamp().values
+    months = np.asarray(months).astype('datetime64[M]')
+    month_ends = (months + 1).astype('datetime64[D]') - 1
+    
+    # 1970-01-01 (day 0) was a Thursday, so Monday-based weekdays are (day + 3) % 7
+    weekday = (month_ends.view('i8') + 3) % 7
+    return month_ends - (weekday - 3) % 7
 
 def is_thursday(date):
     """Check if a date is Thursday"""
@@ -30,6 +51,24 @@ def is_last_thursday_of_month(date):
     last_thursday = get_last_thursday_of_month(date.year, date.month)
     return date.date() == last_thursday.date()
 
+def _mark_expiry_slots(slots, type_codes, adjusted, n_days):
+    """
+    Per-day expiry type code (0 = none, 1 = weekly, 2 = monthly) and adjusted flag
+    
+    slots are the day positions of the expiries in date order; a later expiry landing
+    on the same day overrides the earlier one's type, and any adjustment sticks.
+    """
+    day_type = np.zeros(n_days, np.int8)
+    day_adjusted = np.zeros(n_days, np.int8)
+    for i in range(slots.shape[0]):
+        day_type[slots[i]] = type_codes[i]
+        if adjusted[i]:
+            day_adjusted[slots[i]] = 1
+    return day_type, day_adjusted
+
+if njit is not None:
+    _mark_expiry_slots = njit(cache=True)(_mark_expiry_slots)
+
 def mark_nifty_expiry_days(df, date_column='date', trading_day_column=None):
     """
     Mark NIFTY expiry days in a DataFrame
@@ -49,74 +88,52 @@ def mark_nifty_expiry_days(df, date_column='date', trading_day_column=None):
     # Ensure date column is datetime
     df[date_column] = pd.to_datetime(df[date_column])
     
-    # Sort by date
-    df = df.sort_values(date_column).copy()
-    
-    # Initialize columns
-    df['is_expiry'] = 0
-    df['expiry_type'] = None
-    df['adjusted_expiry'] = 0
+    # Sort by date (sort_values already returns a new frame)
+    df = df.sort_values(date_column)
     
-    # Create a set of all trading dates for quick lookup
+    # Sorted trading days as datetime64[D], without materializing Python date objects
     if trading_day_column:
-        trading_dates = set(df[df[trading_day_column] == 1][date_column].dt.date)
+        trading_days = df.loc[df[trading_day_column] == 1, date_column].values
     else:
-        trading_dates = set(df[date_column].dt.date)
-    
-    # Process each month in the date range
-    start_date = df[date_column].min()
-    end_date = df[date_column].max()
-    
-    current_date = start_date.replace(day=1)
-    
-    while current_date <= end_date:
-        year = current_date.year
-        month = current_date.month
-        
-        # Find all Thursdays in this month
-        month_start = datetime(year, month, 1)
-        if month == 12:
-            month_end = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end = datetime(year, month + 1, 1) - timedelta(days=1)
-        
-        # Get all Thursdays in the month
-        thursdays = []
-        current = month_start
-        while current <= month_end:
-            if is_thursday(current):
-                thursdays.append(current)
-            current += timedelta(days=1)
-        
-        # Process each Thursday
-        for thursday in thursdays:
-            is_monthly = is_last_thursday_of_month(thursday)
-            
-            # Check if Thursday is a trading day
-            if thursday.date() in trading_dates:
-                # Mark as expiry
-                mask = df[date_column].dt.date == thursday.date()
-                df.loc[mask, 'is_expiry'] = 1
-                df.loc[mask, 'expiry_type'] = 'monthly' if is_monthly else 'weekly'
-            else:
-                # Thursday is a holiday, find previous trading day
-                adjusted_date = thursday - timedelta(days=1)
-                while adjusted_date.date() not in trading_dates and adjusted_date >= month_start:
-                    adjusted_date -= timedelta(days=1)
-                
-                if adjusted_date.date() in trading_dates:
-                    mask = df[date_column].dt.date == adjusted_date.date()
-                    df.loc[mask, 'is_expiry'] = 1
-                    df.loc[mask, 'expiry_type'] = 'monthly' if is_monthly else 'weekly'
-                    df.loc[mask, 'adjusted_expiry'] = 1
-        
-        # Move to next month
-        if month == 12:
-            current_date = datetime(year + 1, 1, 1)
-        else:
-            current_date = datetime(year, month + 1, 1)
-    
-    return df
+        trading_days = df[date_column].values
+    trading_days = np.unique(trading_days.astype('datetime64[D]'))
+    
+    # Every Thursday of every month the data touches, stepped a week apart from the first one
+    days = df[date_column].values.astype('datetime64[D]')
+    months = np.arange(days.min().astype('datetime64[M]'), days.max().astype('datetime64[M]') + 1)
+    first_day = months[0].astype('datetime64[D]')
+    first_weekday = (first_day.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    first_thursday = first_day + (3 - first_weekday) % 7
+    thu_days = np.arange(first_thursday, (months[-1] + 1).astype('datetime64[D]'), 7)
+    month_starts = thu_days.astype('datetime64[M]').astype('datetime64[D]')
+    
+    # The last Thursday of each month is its monthly expiry
+    is_monthly = np.isin(thu_days, last_thursday_of_months(months))
+    
+    # The latest trading day on or before each Thursday is its expiry: the Thursday itself,
+    # or the trading day a holiday Thursday rolls back to
+    pos = np.searchsorted(trading_days, thu_days, side='right') - 1
+    expiry_days = trading_days[np.maximum(pos, 0)] if trading_days.size else thu_days
+    adjusted = expiry_days != thu_days
+    
+    # A holiday Thursday rolls back no further than the day before its month starts
+    found = (pos >= 0) & (~adjusted | (expiry_days >= month_starts - np.timedelta64(1, 'D')))
+    
+    # Mark each distinct calendar day once in the integer kernel, then broadcast the
+    # per-day values back to every row of that day
+    unique_days, row_slots = np.unique(days, return_inverse=True)
+    day_type, day_adjusted = _mark_expiry_slots(
+        np.searchsorted(unique_days, expiry_days[found]),
+        np.where(is_monthly[found], 2, 1).astype(np.int8),
+        adjusted[found],
+        len(unique_days)
+    )
+    
+    return df.assign(
+        is_expiry=(day_type[row_slots] != 0).astype(np.int64),
+        expiry_type=pd.Series(EXPIRY_TYPE_NAMES[day_type[row_slots]], index=df.index, dtype=object),  # keep None, not NaN
+        adjusted_expiry=day_adjusted[row_slots].astype(np.int64)
+    )
 
 # SQL Implementation for marking expiry days
 sql_query = """
@@ -6,11 +6,14 @@ Usage:
 python create_raw_expiry_table.py [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
 """
 
+import calendar
+import io
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import lru_cache
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extras import execute_values
 import logging
 import argparse
 
@@ -63,6 +66,54 @@ YEAR_SPECIFIC_HOLIDAYS = {
     '2025-11-05': 'Guru Nanak Jayanti',
 }
 
+# The same calendars keyed by integer tuples, so lookups don't format dates as strings
+_RECURRING_HOLIDAYS = {tuple(map(int, k.split('-'))): v for k, v in NSE_HOLIDAYS.items()}
+_DATED_HOLIDAYS = {tuple(map(int, k.split('-'))): v for k, v in YEAR_SPECIFIC_HOLIDAYS.items()}
+
+# Weekday names indexed Monday = 0, as strftime('%A') spells them
+WEEKDAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], dtype=object)
+
+# Proleptic ordinal of 1970-01-01, for converting datetime64[D] day counts to date ordinals
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+@lru_cache(maxsize=2048)
+def _last_thursday_of_month(year, month):
+    """Last Thursday of a month (cached; a month's answer never changes)"""
+    # Step back from the month's last day straight to its Thursday (weekday 3)
+    last_day = datetime(year, month, calendar.monthrange(year, month)[1])
+    return last_day - timedelta(days=(last_day.weekday() - 3) % 7)
+
+@lru_cache(maxsize=None)
+def _holiday_ordinals(year):
+    """Ordinals of every NSE holiday (recurring and year-specific) in a year"""
+    days = {datetime(year, month, day).toordinal() for month, day in _RECURRING_HOLIDAYS}
+    days.update(datetime(y, month, day).toordinal() for y, month, day in _DATED_HOLIDAYS if y == year)
+    return frozenset(days)
+
+@lru_cache(maxsize=None)
+def _trading_bitmap(year):
+    """Read-only bool array flagging the trading days of a year, indexed by day of year - 1"""
+    first_day = np.datetime64(year - 1970, 'Y').astype('datetime64[D]')
+    days = np.arange(first_day, np.datetime64(year - 1969, 'Y').astype('datetime64[D]'))
+    
+    # 1970-01-01 (day 0) was a Thursday, so Monday-based weekdays are (day + 3) % 7
+    bitmap = (days.view('i8') + 3) % 7 < 5
+    holidays = np.fromiter(_holiday_ordinals(year), dtype=np.int64)
+    bitmap[holidays - _EPOCH_ORDINAL - first_day.view('i8')] = False
+    bitmap.flags.writeable = False
+    return bitmap
+
+def _trading_days(first_day, last_day):
+    """Sorted datetime64[D] array of the trading days from first_day to last_day (inclusive)"""
+    days = np.arange(first_day, last_day + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+    if not days.size:
+        return days
+    
+    # Index the years' bitmaps, laid end to end from January 1st of the first year
+    years = days[[0, -1]].astype('datetime64[Y]')
+    bitmap = np.concatenate([_trading_bitmap(y) for y in range(years[0].astype(int) + 1970, years[1].astype(int) + 1971)])
+    return days[bitmap[(days - years[0].astype('datetime64[D]')).view('i8')]]
+
 class CompleteExpiryTableCreator:
     """Creates complete NIFTY expiry days table with all adjustments"""
     
@@ -146,142 +197,106 @@ class CompleteExpiryTableCreator:
     def is_nse_holiday(self, date):
         """Check if date is NSE holiday"""
         # Check year-specific holidays first
-        date_str = date.strftime('%Y-%m-%d')
-        if date_str in YEAR_SPECIFIC_HOLIDAYS:
-            return True, YEAR_SPECIFIC_HOLIDAYS[date_str]
+        name = _DATED_HOLIDAYS.get((date.year, date.month, date.day))
+        if name:
+            return True, name
         
         # Check recurring holidays
-        month_day = date.strftime('%m-%d')
-        if month_day in NSE_HOLIDAYS:
-            return True, NSE_HOLIDAYS[month_day]
+        name = _RECURRING_HOLIDAYS.get((date.month, date.day))
+        if name:
+            return True, name
         
         return False, None
     
     def is_trading_day(self, date):
         """Check if date is a trading day"""
-        if self.is_weekend(date):
-            return False
-        
-        is_holiday, _ = self.is_nse_holiday(date)
-        return not is_holiday
+        return bool(_trading_bitmap(date.year)[date.timetuple().tm_yday - 1])
     
     def get_previous_trading_day(self, date):
         """Get previous trading day before given date"""
-        current = date - timedelta(days=1)
+        day = np.datetime64(date.date(), 'D')
         
-        while True:
-            if self.is_trading_day(current):
-                return current
-            current -= timedelta(days=1)
-            
-            # Safety check
-            if (date - current).days > 10:
-                logger.warning(f"⚠️  Could not find trading day within 10 days of {date}")
-                return None
+        # Safety check: only look back 10 days
+        candidates = _trading_days(day - np.timedelta64(10, 'D'), day - np.timedelta64(1, 'D'))
+        if not candidates.size:
+            logger.warning(f"⚠️  Could not find trading day within 10 days of {date}")
+            return None
+        
+        return date - timedelta(days=int((day - candidates[-1]).astype(int)))
     
     def get_last_thursday_of_month(self, year, month):
         """Get the last Thursday of a given month"""
-        # Start from last day of month
-        if month == 12:
-            next_month = datetime(year + 1, 1, 1)
-        else:
-            next_month = datetime(year, month + 1, 1)
+        return _last_thursday_of_month(year, month)
+    
+    def generate_expiry_dates(self, start_date, end_date):
+        """Generate all expiry dates with adjustments (as a DataFrame with the table's columns)"""
+        # Every Thursday of the covered months in one range, a week apart from the first one
+        months = np.arange(np.datetime64(start_date, 'M'), np.datetime64(end_date, 'M') + 1)
+        first_day = months[0].astype('datetime64[D]')
+        first_weekday = (first_day.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        thursday_days = np.arange(
+            first_day + (3 - first_weekday) % 7,
+            (months[-1] + 1).astype('datetime64[D]'),
+            7
+        )
         
-        last_day = next_month - timedelta(days=1)
+        # A Thursday is the month's last (monthly expiry) when the next one falls in another month
+        is_monthly = (thursday_days + 7).astype('datetime64[M]') != thursday_days.astype('datetime64[M]')
         
-        # Find last Thursday
-        while last_day.weekday() != 3:  # Thursday is 3
-            last_day -= timedelta(days=1)
+        # One sorted array of trading days (reaching 10 days before the first Thursday) resolves
+        # every expiry with a single searchsorted: the latest trading day on or before each Thursday
+        trading_days = _trading_days(thursday_days[0] - np.timedelta64(10, 'D'), thursday_days[-1])
+        pos = np.searchsorted(trading_days, thursday_days, side='right') - 1
+        expiry_days = trading_days[np.maximum(pos, 0)] if trading_days.size else thursday_days
+        rollback = (thursday_days - expiry_days).astype(int)
         
-        return last_day
-    
-    def generate_expiry_dates(self, start_date, end_date):
-        """Generate all expiry dates with adjustments"""
-        expiry_data = []
-        processed_dates = set()  # To avoid duplicates
+        # A holiday Thursday rolls back at most 10 days
+        found = (pos >= 0) & (rollback <= 10)
         
-        # Process each month
-        current_date = start_date.replace(day=1)
+        # Thursdays with no trading day to fall back to are skipped
+        for current in thursday_days[~found].astype('datetime64[us]').tolist():
+            logger.warning(f"⚠️  Could not find trading day within 10 days of {current}")
+            logger.warning(f"⚠️  Skipping expiry for {current} - no trading day found")
         
-        while current_date <= end_date:
-            year = current_date.year
-            month = current_date.month
-            
-            # Get all Thursdays in the month
-            month_start = datetime(year, month, 1)
-            if month == 12:
-                month_end = datetime(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = datetime(year, month + 1, 1) - timedelta(days=1)
-            
-            # Find last Thursday of month
-            last_thursday = self.get_last_thursday_of_month(year, month)
-            
-            # Process each Thursday
-            current = month_start
-            while current <= month_end:
-                if current.weekday() == 3:  # Thursday
-                    is_monthly = (current.date() == last_thursday.date())
-                    expiry_type = 'monthly' if is_monthly else 'weekly'
-                    
-                    # Check if Thursday is a trading day
-                    if self.is_trading_day(current):
-                        actual_date = current
-                    else:
-                        # Thursday is not a trading day, find previous trading day
-                        actual_date = self.get_previous_trading_day(current)
-                        
-                        if actual_date is None:
-                            logger.warning(f"⚠️  Skipping expiry for {current} - no trading day found")
-                            current += timedelta(days=1)
-                            continue
-                    
-                    # Only add if within our date range and not already processed
-                    if start_date <= actual_date <= end_date and actual_date.date() not in processed_dates:
-                        expiry_data.append({
-                            'date': actual_date.date(),
-                            'day': actual_date.strftime('%A'),
-                            'expiry_type': expiry_type,
-                            'month': actual_date.month,
-                            'year': actual_date.year
-                        })
-                        processed_dates.add(actual_date.date())
-                
-                current += timedelta(days=1)
-            
-            # Move to next month
-            if month == 12:
-                current_date = datetime(year + 1, 1, 1)
-            else:
-                current_date = datetime(year, month + 1, 1)
+        # Keep the expiries that land within our date range
+        actual = expiry_days.astype('datetime64[us]')
+        keep = found & (actual >= np.datetime64(start_date, 'us')) & (actual <= np.datetime64(end_date, 'us'))
+        
+        # Two Thursdays rolling back to the same day keep the earlier one's type; np.unique
+        # returns each day's first occurrence and the days already sorted
+        dates, first = np.unique(expiry_days[keep], return_index=True)
+        types = np.where(is_monthly[keep][first], 'monthly', 'weekly').astype(object)
         
-        # Sort by date
-        expiry_data.sort(key=lambda x: x['date'])
+        expiry_data = pd.DataFrame({
+            'date': dates,
+            'day': WEEKDAY_NAMES[(dates.view('i8') + 3) % 7],
+            'expiry_type': types,
+            'month': dates.astype('datetime64[M]').view('i8') % 12 + 1,
+            'year': dates.astype('datetime64[Y]').view('i8') + 1970,
+        })
         
         logger.info(f"📊 Generated {len(expiry_data)} expiry dates")
         return expiry_data
     
     def load_data(self, expiry_data):
-        """Load expiry data into database using execute_values like database_handler.py"""
+        """Load expiry data into database with COPY (the bulk-load path database_handler.py uses)"""
         try:
-            if not expiry_data:
+            if len(expiry_data) == 0:
                 logger.warning("⚠️  No data to load")
                 return False
             
-            # Convert to list of tuples for execute_values
+            # Serialize the rows once as CSV for COPY
             columns = ['date', 'day', 'expiry_type', 'month', 'year']
-            data = [[row[col] for col in columns] for row in expiry_data]
+            buffer = io.StringIO()
+            pd.DataFrame(expiry_data, columns=columns).to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
             
-            # Insert using execute_values (same pattern as database_handler.py)
-            insert_query = sql.SQL("""
-                INSERT INTO {} ({}) 
-                VALUES %s
-            """).format(
+            copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
                 sql.Identifier(self.table_name),
                 sql.SQL(', ').join(map(sql.Identifier, columns))
             )
             
-            execute_values(self.cursor, insert_query, data)
+            self.cursor.copy_expert(copy_query.as_string(self.connection), buffer)
             self.connection.commit()
             
             logger.info(f"✅ Loaded {len(expiry_data)} records into {self.table_name}")
@@ -28,6 +28,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Kite weekly-expiry month codes: 1-9 for Jan-Sep, O/N/D for Oct-Dec
+KITE_MONTH_CODES = {
+    1: '1', 2: '2', 3: '3', 4: '4', 5: '5', 6: '6',
+    7: '7', 8: '8', 9: '9', 10: 'O', 11: 'N', 12: 'D'
+}
+
 class NiftyOIFetcherStandalone:
     """All-in-one NIFTY OI fetcher with database"""
     
@@ -114,33 +120,24 @@ class NiftyOIFetcherStandalone:
         today = datetime.now()
         expiries = []
         
-        # Find next Thursdays
-        current_date = today
+        # Jump straight to the next Thursday; today's expiry counts only before 15:00
+        days_ahead = (3 - today.weekday()) % 7  # Thursday is 3
+        if days_ahead == 0 and today.hour >= 15:
+            days_ahead = 7
         
-        while len(expiries) < num_expiries:
-            # If it's Thursday and after current time, or any day after today
-            if current_date.weekday() == 3:  # Thursday
-                if current_date.date() > today.date() or (current_date.date() == today.date() and today.hour < 15):
-                    # Format: YY + M + DD where M is month number (1-9 for Jan-Sep, O for Oct, N for Nov, D for Dec)
-                    year = current_date.strftime("%y")
-                    month = current_date.month
-                    day = current_date.strftime("%d")
-                    
-                    # Month mapping for Kite
-                    month_map = {
-                        1: '1', 2: '2', 3: '3', 4: '4', 5: '5', 6: '6',
-                        7: '7', 8: '8', 9: '9', 10: 'O', 11: 'N', 12: 'D'
-                    }
-                    
-                    month_code = month_map[month]
-                    expiry_code = f"{year}{month_code}{day}"
-                    
-                    # Format date as DD-MMM-YYYY
-                    expiry_date_str = current_date.strftime("%d-%b-%Y").upper()
-                    
-                    expiries.append((current_date, expiry_code, expiry_date_str))
+        for week in range(num_expiries):
+            current_date = today + timedelta(days=days_ahead + 7 * week)
             
-            current_date += timedelta(days=1)
+            # Format: YY + M + DD using the Kite month code
+            year = current_date.strftime("%y")
+            month_code = KITE_MONTH_CODES[current_date.month]
+            day = current_date.strftime("%d")
+            expiry_code = f"{year}{month_code}{day}"
+            
+            # Format date as DD-MMM-YYYY
+            expiry_date_str = current_date.strftime("%d-%b-%Y").upper()
+            
+            expiries.append((current_date, expiry_code, expiry_date_str))
         
         return expiries
     
@@ -187,42 +184,34 @@ class NiftyOIFetcherStandalone:
             for expiry_date, expiry_code, expiry_date_str in expiries:
                 logger.info(f"\n📥 Fetching data for expiry: {expiry_date_str}")
                 
-                # Build symbols for this expiry
-                symbols = []
-                for strike in strikes:
-                    for opt_type in ["CE", "PE"]:
-                        symbol = f"NIFTY{expiry_code}{strike}{opt_type}"
-                        symbols.append(symbol)
+                # Build NFO-prefixed symbols for this expiry from a precomputed prefix
+                nfo_prefix = f"NFO:NIFTY{expiry_code}"
+                strike_start = len(nfo_prefix)
+                symbols = [f"{nfo_prefix}{strike}{opt_type}" for strike in strikes for opt_type in ("CE", "PE")]
                 
                 # Fetch in batches
                 batch_size = 200
                 for i in range(0, len(symbols), batch_size):
                     batch = symbols[i:i + batch_size]
-                    full_symbols = [f"NFO:{sym}" for sym in batch]
                     
-                    logger.info(f"📥 Fetching batch {i//batch_size + 1} for {expiry_date_str}")
+                    logger.info("📥 Fetching batch %d for %s", i // batch_size + 1, expiry_date_str)
                     
                     try:
-                        quotes = self.kite.quote(full_symbols)
+                        quotes = self.kite.quote(batch)
                         
-                        for sym in batch:
-                            full_sym = f"NFO:{sym}"
+                        for full_sym in batch:
                             data = quotes.get(full_sym, {})
                             
                             if data and "last_price" in data:
                                 ohlc = data.get("ohlc", {})
                                 
-                                # Extract strike and option type
-                                if expiry_code in sym:
-                                    remaining = sym.replace(f"NIFTY{expiry_code}", "")
-                                    strike = int(remaining[:-2])
-                                    option_type = remaining[-2:]
-                                else:
-                                    continue
+                                # Strike and option type sit at fixed offsets after the prefix
+                                strike = int(full_sym[strike_start:-2])
+                                option_type = full_sym[-2:]
                                 
                                 row = (
                                     timestamp,
-                                    sym,
+                                    full_sym[len("NFO:"):],
                                     expiry_date_str,  # Use formatted date instead of code
                                     strike,
                                     option_type,
@@ -284,17 +273,23 @@ class NiftyOIFetcherStandalone:
         print(f"📅 Timestamp: {df['timestamp'].iloc[0]}")
         print("="*80)
         
+        # Split the snapshot once into per-expiry frames instead of re-masking per expiry
+        frames_by_expiry = dict(tuple(df.groupby('expiry', sort=False)))
+        
         # Summary for each expiry
         for expiry_date, expiry_code, expiry_date_str in expiries:
-            expiry_df = df[df['expiry'] == expiry_date_str]
+            expiry_df = frames_by_expiry.get(expiry_date_str)
             
-            if not expiry_df.empty:
+            if expiry_df is not None and not expiry_df.empty:
                 print(f"\n📅 EXPIRY: {expiry_date_str}")
                 print("-" * 50)
                 
+                ce_df = expiry_df[expiry_df['option_type'] == 'CE']
+                pe_df = expiry_df[expiry_df['option_type'] == 'PE']
+                
                 # Calculate totals
-                total_ce_oi = expiry_df[expiry_df['option_type'] == 'CE']['oi'].sum()
-                total_pe_oi = expiry_df[expiry_df['option_type'] == 'PE']['oi'].sum()
+                total_ce_oi = ce_df['oi'].sum()
+                total_pe_oi = pe_df['oi'].sum()
                 pcr = total_pe_oi / total_ce_oi if total_ce_oi > 0 else 0
                 
                 print(f"Total CE OI: {total_ce_oi:,}")
@@ -302,19 +297,20 @@ class NiftyOIFetcherStandalone:
                 print(f"PCR (OI): {pcr:.2f}")
                 
                 # Max OI strikes
-                max_ce_oi = expiry_df[expiry_df['option_type'] == 'CE'].nlargest(1, 'oi')
-                max_pe_oi = expiry_df[expiry_df['option_type'] == 'PE'].nlargest(1, 'oi')
+                max_ce_oi = ce_df.nlargest(1, 'oi')
+                max_pe_oi = pe_df.nlargest(1, 'oi')
                 
                 if not max_ce_oi.empty:
                     print(f"Max CE OI Strike (Resistance): {max_ce_oi.iloc[0]['strike']}")
                     print(f"Max PE OI Strike (Support): {max_pe_oi.iloc[0]['strike']}")
         
         # Overall summary
+        oi_by_type = df.groupby('option_type')['oi'].sum()
         print(f"\n📈 OVERALL STATISTICS:")
         print(f"Total Records: {len(df)}")
-        print(f"Total Expiries: {len(df['expiry'].unique())}")
-        print(f"Total CE OI (All Expiries): {df[df['option_type'] == 'CE']['oi'].sum():,}")
-        print(f"Total PE OI (All Expiries): {df[df['option_type'] == 'PE']['oi'].sum():,}")
+        print(f"Total Expiries: {len(frames_by_expiry)}")
+        print(f"Total CE OI (All Expiries): {oi_by_type.get('CE', 0):,}")
+        print(f"Total PE OI (All Expiries): {oi_by_type.get('PE', 0):,}")
     
     def close(self):
         """Close connections"""
@@ -13,6 +13,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import time
+import threading
 import os
 import plotly.graph_objects as go
 import plotly.express as px
@@ -234,8 +235,14 @@ class StreamlitDataExtractor(BaseDataExtractor):
         self.api_key = os.environ["KITE_API_KEY"]
         self.kite = KiteConnect(api_key=self.api_key)
         self.kite.set_access_token(self.access_token)
+        self._configure_session()
         self.output_dir = output_dir or os.getenv("OUTPUT_DIR", os.path.join(os.getcwd(), "datafiles"))
         self._expiry_cache = {}
+        self._instruments_cache = {}
+        self._instruments_df = {}
+        self._symbol_index = {}
+        self._instruments_lock = threading.Lock()
+        self._profile = None
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
             print(f"📁 Created output directory: {self.output_dir}")
@@ -325,28 +332,29 @@ def load_instruments_from_extractor():
     try:
         # Get NSE stocks
         try:
-            nse_instruments = st.session_state.extractor.kite.instruments("NSE")
+            # Shares the extractor's cached dump, so search_instrument doesn't download it again
+            df = st.session_state.extractor._get_instruments_df("NSE")
+            symbols = df['tradingsymbol'].astype(str)
+            names = df['name'].fillna('').astype(str)
             
-            stocks = []
-            for instrument in nse_instruments:
-                # Only include proper equity stocks, exclude derivatives/bonds
-                if (instrument['segment'] == 'NSE' and 
-                    instrument['instrument_type'] == 'EQ' and
-                    instrument['name'] and  # Must have a name
-                    not any(char.isdigit() for char in instrument['tradingsymbol'][-3:]) and  # Exclude numbered series
-                    '-' not in instrument['tradingsymbol'] and  # Exclude hyphenated symbols (usually derivatives)
-                    len(instrument['tradingsymbol']) <= 15):  # Reasonable length for stock symbols
-                    
-                    stocks.append({
-                        'symbol': instrument['tradingsymbol'],
-                        'name': instrument['name'],
-                        'token': instrument['instrument_token'],
-                        'display': f"{instrument['tradingsymbol']} - {instrument['name']}"
-                    })
+            # Only include proper equity stocks, exclude derivatives/bonds
+            mask = (
+                (df['segment'] == 'NSE') &
+                (df['instrument_type'] == 'EQ') &
+                ~symbols.str[-3:].str.contains(r'\d', regex=True) &  # Exclude numbered series
+                ~symbols.str.contains('-', regex=False) &  # Exclude hyphenated symbols (usually derivatives)
+                (symbols.str.len() <= 15) &  # Reasonable length for stock symbols
+                (names != '-') &
+                (names.str.len() > 2)  # Must have a real name
+            )
             
-            # Filter out any remaining invalid entries
-            stocks = [s for s in stocks if s['name'] and s['name'] != '-' and len(s['name']) > 2]
-            stocks = sorted(stocks, key=lambda x: x['symbol'])
+            eq = pd.DataFrame({
+                'symbol': symbols[mask],
+                'name': names[mask],
+                'token': df.loc[mask, 'instrument_token'],
+            }).sort_values('symbol', kind='stable')
+            eq['display'] = eq['symbol'] + ' - ' + eq['name']
+            stocks = eq.to_dict('records')
             st.session_state.nse_stocks = stocks
             
         except Exception:
@@ -531,7 +539,7 @@ def extract_data(symbol, days, interval, data_type="stock", instrument_token=Non
                     filename = f"{safe_symbol}_{days}days_{interval}.csv"
                     
                     # Use save_data method which handles output directory
-                    success = st.session_state.extractor.save_data(df, filename, symbol)
+                    success = st.session_state.extractor.save_data(df, filename, symbol, fmt="csv")
                     
                     if success:
                         # Store filename for display
@@ -586,7 +594,7 @@ def extract_data(symbol, days, interval, data_type="stock", instrument_token=Non
             
             if save_mode == "csv":
                 # Use existing method which saves to CSV
-                df = st.session_state.extractor.extract_stock_data(symbol, days=days, interval=interval)
+                df = st.session_state.extractor.extract_stock_data(symbol, days=days, interval=interval, fmt="csv")
                 
                 # Store filename for display
                 filename = f"{symbol.lower()}_{days}days_{interval}.csv"
@@ -865,6 +873,11 @@ def create_volume_chart(df):
     
     st.plotly_chart(fig, use_container_width=True)
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def dataframe_to_csv(df):
+    """Encode a DataFrame as CSV bytes for download (cached, so reruns don't re-serialize it)"""
+    return df.to_csv(index=False, lineterminator='\n').encode('utf-8')
+
 def show_data_table(df):
     """Show data table with filtering and enhanced design"""
     if df is None or df.empty:
@@ -934,7 +947,7 @@ def show_data_table(df):
     # Download button with better styling
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        csv = df.to_csv(index=False)
+        csv = dataframe_to_csv(df)
         st.download_button(
             label="📥 Download Complete Dataset as CSV",
             data=csv,
@@ -1012,7 +1025,7 @@ def main():
                     if st.session_state.last_extracted_symbol:
                         st.metric("Symbol", st.session_state.last_extracted_symbol)
                 
-                csv = df.to_csv(index=False)
+                csv = dataframe_to_csv(df)
                 st.download_button(
                     label="💾 Quick Download",
                     data=csv,